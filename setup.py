@@ -30,6 +30,7 @@ setuptools.setup(
         batch_tune=spl_widgets.batch_tune:main
         jukemake=spl_widgets.jukemake:main
         autoscorer=spl_widgets.autoscorer.autoscorer_gui:main
+        autoscorer_batch=spl_widgets.autoscorer.autoscorer_batch:main
     ''',
     include_package_data=True,
     package_data={'': ['data/*']}
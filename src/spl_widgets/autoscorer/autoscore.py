@@ -1,49 +1,61 @@
-from tkinter import Tk
-from tkinter.filedialog import askopenfilename
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 from openpyxl import Workbook
 from openpyxl.worksheet import dimensions
 from openpyxl.worksheet.worksheet import Worksheet
 
-from typing import TypeAlias, Literal
+from itertools import chain
+from collections import deque
+from typing import TypeAlias, Literal, Callable, Iterable, Iterator, NamedTuple
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
 
+from spl_widgets.autoscorer import tokenize_to_ipa
 from spl_widgets.autoscorer.tokenize_to_ipa import *
-from spl_widgets.util.color_util import to_rich_text
+from spl_widgets.util.sqlite_db import SQLiteDB
+from spl_widgets.util.cache_util import PersistentCache
+from spl_widgets.util.color_util import RichTextSegments, append_segment, segments_to_rich_text
 
 AutoscorerTokens: TypeAlias =  list[ tuple[str, int, bool|None] ]
 ScoringMode: TypeAlias = Literal['preferred-transcription', 'best-match']
+ScoringMethod: TypeAlias = Literal['table', 'memo']
+BestMatchSearch: TypeAlias = Literal['lattice', 'exhaustive']
+Scoring: TypeAlias = tuple[int, tuple[int, ...]]        # a score, and the choice of pronunciations giving it
+
+# the most subproblems scored by the 'memo' scoring method before falling back to the 'table' method
+MEMO_MAX_STATES = 100_000
+
+# the most (unique) pairs scored between progress reports and cancellation checks (see iter_score_subjects())
+PROGRESS_CHUNK_SIZE = 64
+
+# part of the key of every cached result (see PersistentCache) - increment this whenever a change to the
+# scoring or its output would change results, so that results cached by earlier versions are not reused
+SCORER_VERSION = 2
 
 # this version of the autoscorer uses a token list instead of a string, allowing
 # for the treatment of 2+ wide characters (e.g. diphthongs) as single tokens
 def score_transcription(
     sentence_ipa: list[str],
     transcription_ipa: list[str],
-    _prev_scored: AutoscorerTokens = ...,
-    _prev_transcription_idx: int=0
+    scoring_method: ScoringMethod = "table",
+    max_states: int = MEMO_MAX_STATES
     ) -> tuple[int, AutoscorerTokens]:
     """
-    Scores the inputted transcription IPA based on the passed target sentence IPA using recursion
+    Scores the inputted transcription IPA based on the passed target sentence IPA using dynamic programming
 
     Parameters
     ----------
         @param sentence_ipa ( list[str] ): the input IPA (tokenized) of the target sentence
         @param transcription_ipa ( list[str] ): the input IPA (tokenized) of the subject's transcription
-
-    ### Internal Parameters (Not to be passed by user)
-
-        @param _prev_scored ( list[tuple[str,int,bool|None]] ):
-        the tokens already scored
-
-        @param _prev_transcription_idx ( int ):
-            the current absolute index of the start of the passed transcription IPA. Added to a token's  relative
-             transcription IPA index when it is appended to _prev_scored (transcription_ipa is consumed during recursion)
+        @param scoring_method ( 'table' | 'memo' ): how the best scores are found (see below)
+        @param max_states ( int ): the most subproblems the 'memo' method may score before falling back to 'table'
 
     Returns
     -------
         @returns score ( int ): the maximum allowable score for the subject's transcription
-        @returns prev_scored ( list[tuple[str, int, bool|None]] ): the scored tokens
+        @returns scored ( list[tuple[str, int, bool|None]] ): the scored tokens
 
     ---
 
@@ -51,12 +63,27 @@ def score_transcription(
     -------
 
     This function does the main legwork of the module, taking in the target and transcribed sentences as IPA
-    and returning the maximum allowable score by recursively parsing them, and storing each processed token
-    in the transcribed IPA (as well as omitted tokens from the target IPA) in a list for formatting by output_scoring()
-
-    ### NB: Information about the contents of _prev_scored:
-
-    _prev_scored is a list of tokens (tuples) of the form ( str, int, bool | None )
+    and returning the maximum allowable score, and storing each processed token in the transcribed IPA
+    (as well as omitted tokens from the target IPA) in a list for formatting by output_scoring()
+
+    Each IPA token of the transcription is taken in turn against the current position in the sentence IPA:
+    - if it is the next IPA token of the sentence, it is valid and both positions move forward
+    - if it occurs later in the sentence, it may either be taken as valid (jumping forward in the sentence and
+    omitting all intervening tokens) or as extraneous (staying at the same point in the sentence), whichever
+    scores better (jumping forward if both score the same)
+    - otherwise, it is extraneous
+
+    Rather than trying both options of each choice recursively (exponential in the worst case), the best score
+    from each (sentence position, transcription position) pair is found once, and the tokens are then scored
+    forwards by following these best scores. They are found either:
+    - 'table': for every pair, tabulated backwards from the end of both IPAs (see _score_table())
+    - 'memo': only for the pairs actually reached from the start, recursively with memoization (see
+    _memo_best_score()). This is faster when few choices arise, but falls back to 'table' if it would
+    need more than max_states subproblems
+
+    ### NB: Information about the contents of scored:
+
+    scored is a list of tokens (tuples) of the form ( str, int, bool | None )
     Each of these contains information that tells the program how to score and output the token (see below):
 
     - str: the token text
@@ -65,94 +92,191 @@ def score_transcription(
 
     """
 
-    def curr_score():
-        return sum((n[2] is True) for n in _prev_scored)
+    first_ipa_idx, next_token_idx = _sentence_lookups(sentence_ipa)
 
-    def last_token_idx():
-        return max((n[1] for n in _prev_scored), default=0)
+    best_score = None
+    if scoring_method == "memo":
+        try:
+            best_score = _memo_best_score(sentence_ipa, transcription_ipa, first_ipa_idx, next_token_idx, max_states)
+        except _StateLimitExceeded:
+            print(f"[WARN]: Memoized scoring needed over {max_states} states, falling back to the score table")
 
-    # reached end of sentence IPA, so we mark any further transcription IPA tokens as extraneous and return
-    if sentence_ipa == []:
-        lti = last_token_idx()
-        for i, token in enumerate(transcription_ipa, start=1):
-            _prev_scored.append((token,lti+i,False))
+    if best_score is None:
+        score_table = _score_table(sentence_ipa, transcription_ipa, first_ipa_idx, next_token_idx)
+        best_score = lambda i, s: score_table[i][s]
 
-        return (curr_score(), _prev_scored)
+    scored: AutoscorerTokens = []
+    sentence_idx = 0
+    last_ipa_idx = -1           # index of the last IPA token of the transcription scored
 
-    # if we are at the top level of our function, initialize _prev_scored
-    if _prev_transcription_idx==0:
-        _prev_scored = []
+    for (i, token) in enumerate(transcription_ipa):
 
-    sentence_ipa_idx = 0
-    for i, token in enumerate(transcription_ipa):
+        # reached end of sentence IPA, so we mark any further transcription IPA tokens as extraneous
+        if sentence_idx == len(sentence_ipa):
+            scored.extend( (tk, j, False) for (j, tk) in enumerate(transcription_ipa[i:], start=i) )
+            return (best_score(0, 0), scored)
 
-        absolute_idx = i+_prev_transcription_idx
         if not token.isalpha():                      # non-IPA (space) token
             continue
 
-        # get next IPA char from sentence, skipping spaces etc. 
-        while not sentence_ipa[sentence_ipa_idx].isalpha():
-            sentence_ipa_idx += 1
-
-        if token == sentence_ipa[sentence_ipa_idx]:
-            # The character is both valid (exists in sentence IPA) and is the character we are currently
-            # looking for (first IPA character in sentence IPA)
-
-            # so take it no matter what (shouldn't affect score but please fact-check me I'm not sure)
-            return score_transcription(
-                sentence_ipa[sentence_ipa_idx + 1:],
-                transcription_ipa[i+1:],
-                _prev_scored+[(token,absolute_idx,True)],
-                absolute_idx+1
-            )
-
-        elif token in sentence_ipa:
-            # the character could be valid but it is ahead of the current position in the sentence, so we optimize
-            # score by running two scoring passes on the remaining IPA – one where we consider the character
-            # extraneous and stay at the same point in the source (sentence) IPA, and one where we consider
-            # it valid and jump forward in the source IPA, considering all intervening characters extraneous.
-            # We then return the maximum score between these two runs as our optimized score
-
-            # get the potential jump-ahead index of the character in the sentence IPA
-            new_sentence_ipa_idx = sentence_ipa.index(token)
-
-            # make a token we can append to _prev_scored if we decide to omit these characters
-            tokens_between = "".join(                                    # get the omitted tokens
-                sentence_ipa[sentence_ipa_idx:new_sentence_ipa_idx]
-            )
-
-            # get the index of the first omitted char in this group
-            omitted_idx = 0                 # prevent the program breaking if the omitted character is the very first of the transcription
-            if len(_prev_scored) > 0:
-                omitted_idx = max(n[1] for n in _prev_scored)+1
-            omitted_chars = [(tokens_between.strip(), omitted_idx, None)]            # create the token
-
-            return max(
-                # take this char as the next valid one and jump forward to it in the sentence IPA
-                score_transcription(
-                    sentence_ipa[new_sentence_ipa_idx+1:],
-                    transcription_ipa[i+1:],
-                    _prev_scored + omitted_chars + [(token,absolute_idx,True)],
-                    absolute_idx+1
-                ),
-                # take this char as extraneous and move to the next character without moving forward in the sentence IPA
-                score_transcription(
-                    sentence_ipa,
-                    transcription_ipa[i+1:],
-                    _prev_scored + [(token,absolute_idx,False)],
-                    absolute_idx+1
-                ),
-                key = lambda n: n[0]    # get max by score
-            )
-
-        # character is not found in the sentence IPA, and thus could not
-        # possibly be valid – so, we mark it as extraneous and move on
+        # the token could be valid if it is the next IPA token of the sentence (no jump), or is ahead of it
+        jump_idx = next_token_idx(token)[sentence_idx]
+        if jump_idx is not None:
+            next_ipa_idx = first_ipa_idx[sentence_idx]
+            jump_score = 1 + best_score(i+1, jump_idx+1)
+
+            if jump_idx == next_ipa_idx:
+                scored.append((token, i, True))
+                sentence_idx = jump_idx+1
+
+            elif jump_score >= best_score(i+1, sentence_idx):
+                tokens_between = "".join(sentence_ipa[next_ipa_idx:jump_idx])    # get the omitted tokens
+                scored.append((tokens_between.strip(), last_ipa_idx+1, None))
+                scored.append((token, i, True))
+                sentence_idx = jump_idx+1
+
+            else:
+                scored.append((token, i, False))
+
+        # character is not found in the rest of the sentence IPA, and thus could
+        # not possibly be valid – so, we mark it as extraneous and move on
         else:
-            _prev_scored.append((token,absolute_idx,False))
+            scored.append((token, i, False))
+
+        last_ipa_idx = i
 
     # reached end of transcription IPA, add any remaining sentence IPA tokens as omitted and return
-    _prev_scored.append(("".join(sentence_ipa), last_token_idx()+1, None))
-    return (curr_score(), _prev_scored)
+    if sentence_idx < len(sentence_ipa):
+        scored.append(("".join(sentence_ipa[sentence_idx:]), max(last_ipa_idx, 0)+1, None))
+
+    return (best_score(0, 0), scored)
+
+# the index of the first IPA token at or after each sentence index, and (per token, built
+# on demand) the index of its first occurrence at or after each sentence index
+def _sentence_lookups(
+    sentence_ipa: list[str]
+    ) -> tuple[list[int|None], Callable[[str], list[int|None]]]:
+
+    n = len(sentence_ipa)
+
+    first_ipa_idx: list[int|None] = [None]*(n+1)
+    for s in range(n-1, -1, -1):
+        first_ipa_idx[s] = s if sentence_ipa[s].isalpha() else first_ipa_idx[s+1]
+
+    next_idx_by_token: dict[str, list[int|None]] = {}
+    def next_token_idx(token: str) -> list[int|None]:
+        if token not in next_idx_by_token:
+            next_idx = [None]*(n+1)
+            for s in range(n-1, -1, -1):
+                next_idx[s] = s if sentence_ipa[s] == token else next_idx[s+1]
+            next_idx_by_token[token] = next_idx
+
+        return next_idx_by_token[token]
+
+    return (first_ipa_idx, next_token_idx)
+
+def _score_table(
+    sentence_ipa: list[str],
+    transcription_ipa: list[str],
+    first_ipa_idx: list[int|None],
+    next_token_idx: Callable[[str], list[int|None]]
+    ) -> list[list[int]]:
+    """
+    Tabulates the best score attainable from each point of scoring in score_transcription(),
+    as score_table[i][s] for the transcription IPA from index i and the sentence IPA from index s
+    """
+
+    n = len(sentence_ipa)
+
+    # nothing more can be scored from the end of either IPA
+    score_table: list[list[int]] = [[]]*len(transcription_ipa) + [[0]*(n+1)]
+    sentence_ipa_tokens = set(sentence_ipa)
+
+    for i in range(len(transcription_ipa)-1, -1, -1):
+        token = transcription_ipa[i]
+        next_scores = score_table[i+1]
+
+        if not (token.isalpha() and token in sentence_ipa_tokens):
+            score_table[i] = next_scores
+            continue
+
+        score_table[i] = [
+            next_scores[s] if jump_idx is None
+            else 1 + next_scores[jump_idx+1] if jump_idx == first_ipa_idx[s]
+            else max(1 + next_scores[jump_idx+1], next_scores[s])
+            for (s, jump_idx) in enumerate(next_token_idx(token))
+        ]
+
+    return score_table
+
+class _StateLimitExceeded(Exception): pass
+
+def _memo_best_score(
+    sentence_ipa: list[str],
+    transcription_ipa: list[str],
+    first_ipa_idx: list[int|None],
+    next_token_idx: Callable[[str], list[int|None]],
+    max_states: int
+    ) -> Callable[[int, int], int]:
+    """
+    Finds the best score attainable from the start of both IPAs top-down, memoizing the best score
+    of each subproblem reached (keyed by the transcription and sentence indices it starts from), and
+    returns a function giving the best score from any point of scoring reached along the way
+
+    Raises _StateLimitExceeded if more than max_states subproblems would need to be scored
+    """
+
+    # the index of the next transcription token at or after each index that could be valid
+    sentence_ipa_tokens = set(sentence_ipa)
+    next_scorable_idx = [len(transcription_ipa)]*(len(transcription_ipa)+1)
+    for i in range(len(transcription_ipa)-1, -1, -1):
+        token = transcription_ipa[i]
+        is_scorable = token.isalpha() and token in sentence_ipa_tokens
+        next_scorable_idx[i] = i if is_scorable else next_scorable_idx[i+1]
+
+    # tokens that could not be valid and non-IPA sentence tokens make no difference to the score,
+    # so the subproblem from any point of scoring is that from the next token of each that does
+    def subproblem(i: int, s: int) -> tuple[int, int]|None:
+        i, s = next_scorable_idx[i], first_ipa_idx[s]
+        if i == len(transcription_ipa) or s is None:
+            return None                                 # nothing more can be scored
+        return (i, s)
+
+    memo: dict[tuple[int, int]|None, int] = {None: 0}
+
+    def best_score(i: int, s: int) -> int:
+        return memo[subproblem(i, s)]
+
+    # depth-first with an explicit stack rather than recursion, which long transcriptions would overflow
+    stack = [subproblem(0, 0)]
+    while stack:
+        key = stack[-1]
+        if key in memo:
+            stack.pop()
+            continue
+
+        i, s = key
+        jump_idx = next_token_idx(transcription_ipa[i])[s]
+
+        # the subproblems this one depends on (see score_transcription())
+        if jump_idx is None:
+            options = [(0, subproblem(i+1, s))]
+        elif jump_idx == s:
+            options = [(1, subproblem(i+1, jump_idx+1))]
+        else:
+            options = [(1, subproblem(i+1, jump_idx+1)), (0, subproblem(i+1, s))]
+
+        unscored = [option for (_, option) in options if option not in memo]
+        if unscored:
+            if len(memo) + len(stack) > max_states:
+                raise _StateLimitExceeded
+            stack.extend(unscored)
+            continue
+
+        memo[key] = max(gain + memo[option] for (gain, option) in options)
+        stack.pop()
+
+    return best_score
 
 # this is probably not incredibly elegant (the colorizing part) but it does its job, and it shouldn't ever need to
 # be changed too much functionally (except to add more features) because the data structure it gets from score() will stay the same
@@ -160,9 +284,9 @@ def output_scoring(
     sentence_ipa: list[str],
     transcription_ipa: list[str],
     results: tuple[ int, AutoscorerTokens ]
-    ) -> tuple[int,int,str, list[int]]:
+    ) -> tuple[int,int,RichTextSegments, list[int]]:
     """
-    Takes the results of score_transcription() and outputs them as formatted strings
+    Takes the results of score_transcription() and outputs them as formatted segments
     containing the autoscorer's evaluation and score for the transcription
 
     Parameters
@@ -175,20 +299,21 @@ def output_scoring(
     -------
         @returns score ( int ): the autoscorer's score for the transcription
         @returns best_poss_score ( int ): the best possible score for the target sentence
-        @returns evaluation ( str ): the autoscorer's evaluation of the transcription's IPA, to be passed to to_rich_text
+        @returns evaluation ( RichTextSegments ): the autoscorer's evaluation of the transcription's IPA as
+        (color, text) runs, to be passed to segments_to_rich_text
+        @returns score_by_phoneme ( list[int] ): 1 or 0 for each phoneme of the target, as it was included or omitted
 
     """
 
-    # color codes for to_rich_text()
-    RED = "\\R"
-    GREEN = "\\G"
-    YELLOW = "\\Y"
-    CLEARSTYLE = "\\C"
+    # color codes for segments_to_rich_text()
+    RED = "R"
+    GREEN = "G"
+    YELLOW = "Y"
+    CLEARSTYLE = ""
 
     score, prev_scored = results
 
     best_poss_score = sum( map(str.isalpha, sentence_ipa) )
-    transcription_chars = [*transcription_ipa]                  # split the string
 
     # produce score by phoneme
     score_by_phoneme = []
@@ -202,192 +327,808 @@ def output_scoring(
         tok_len = len([*filter(str.isalpha, tokenize_ipa(token))])
         score_by_phoneme.extend([0]*tok_len)
 
-    # separate tokens into included and omitted for the two formatting passes
-    included_tokens = [*filter(lambda n: n[2] is not None, prev_scored)]
-    omitted_tokens = [*filter(lambda n: n[2] is None, prev_scored)]
+    # included tokens are colored in place of the transcription's token at their index,
+    # and omitted tokens are shown (in parentheses) before the token at their index
+    colored_tokens: dict[int, tuple[str, str]] = {}
+    omitted_before: dict[int, list[str]] = {}
+    for (token, idx, is_valid) in prev_scored:
+        if is_valid is None:
+            omitted_before.setdefault(idx, []).append(token)
+        else:
+            colored_tokens[idx] = ((GREEN if is_valid else YELLOW), token)
 
-    # included tokens can be edited in-place
-    for (token, idx, is_valid) in included_tokens:
-        token_color = (GREEN if is_valid else YELLOW)
-        transcription_chars[idx] = token_color + token + CLEARSTYLE
+    def append_omitted(omitted: list[str]):
+        for token in omitted:
+            append_segment(evaluation, CLEARSTYLE, "(")
+            append_segment(evaluation, RED, token)
+            append_segment(evaluation, CLEARSTYLE, ")")
 
-    # omitted tokens must be inserted
-    # (NB: an index increment is required as insertion into a list
-    # will change the next index we wish to insert at)
-    incr = 0
-    for (token,idx,_) in omitted_tokens:
+    # build the evaluation a token at a time, merging adjacent tokens of the same color
+    evaluation: RichTextSegments = []
+    for (idx, token) in enumerate(transcription_ipa):
+        append_omitted(omitted_before.pop(idx, []))
+        append_segment(evaluation, *colored_tokens.get(idx, (CLEARSTYLE, token)))
 
-        transcription_chars.insert(
-            idx+incr,
-            f"({RED}{token}{CLEARSTYLE})"
-        )
-        incr += 1
+    for omitted in omitted_before.values():     # omitted after the end of the transcription
+        append_omitted(omitted)
 
-    evaluation = "".join(transcription_chars)   # combine all tokens for evaluation
     return (score, best_poss_score, evaluation, score_by_phoneme)
 
 def get_results(
     sentence_ipa: str,
     transcription: str,
-    scoring_mode: ScoringMode
+    scoring_mode: ScoringMode,
+    scoring_method: ScoringMethod = "table",
+    beam_width: int|None = None,
+    best_match_search: BestMatchSearch = "lattice",
+    max_states: int = MEMO_MAX_STATES
     ) -> tuple[ list[str], tuple[int, AutoscorerTokens] ]:
     
     if scoring_mode == "preferred-transcription":
         transcription_ipa = str_to_ipa(transcription, True)
-        return (transcription_ipa, score_transcription(sentence_ipa, transcription_ipa))
+        return (transcription_ipa, score_transcription(sentence_ipa, transcription_ipa, scoring_method, max_states))
+
+    elif scoring_mode == "best-match" and best_match_search == "exhaustive":
+        poss_transcription_ipas = map(arpa_to_ipa, iter_arpabet_all(transcription))
+        return best_scoring(sentence_ipa, poss_transcription_ipas, scoring_method, max_states)
 
     elif scoring_mode == "best-match":
-        poss_results = []
-        poss_transcription_ipas = [*map(arpa_to_ipa, to_arpabet_all(transcription))]
+        transcription_ipa = best_match_ipa(sentence_ipa, transcription, beam_width)
+        return (transcription_ipa, score_transcription(sentence_ipa, transcription_ipa, scoring_method, max_states))
 
-        for ipa in poss_transcription_ipas:
-            poss_results.append( (ipa, score_transcription(sentence_ipa, ipa)) )
+# scores each of the possible transcription IPAs in turn, keeping only the best so far (the first, if several
+# score the same), so any number of them can be scored (e.g. lazily from iter_arpabet_all()) in constant memory
+def best_scoring(
+    sentence_ipa: list[str],
+    poss_transcription_ipas: Iterable[list[str]],
+    scoring_method: ScoringMethod = "table",
+    max_states: int = MEMO_MAX_STATES
+    ) -> tuple[ list[str], tuple[int, AutoscorerTokens] ]:
 
-        return max(poss_results, key = lambda n: n[1][0])
+    best_result = None
+    for ipa in poss_transcription_ipas:
+        results = score_transcription(sentence_ipa, ipa, scoring_method, max_states)
+        if best_result is None or results[0] > best_result[1][0]:
+            best_result = (ipa, results)
 
-def process_inputs(
-    inputs: list[tuple[str,str]],
-    ws: Worksheet,
-    scoring_mode: ScoringMode,
-    ideal_ipa: list[str] = ...
-    ) -> tuple[dict[str, list[int]], list[list[str]]]:
-    
-    # utility function to make populating rows of the output file faster
-    def fill_row(row: int, values: tuple[str,...]):
-        for i, col in enumerate("ABCDEF"):
-            ws[f"{col}{row}"] = values[i]
-
-    # write header
-    fill_row(
-        1, (
-            "Source Sentence", "Source IPA",
-            "Transcribed Sentence", "Transcribed IPA",
-            "Autoscore Evaluation", "Autoscore Score"
-            )
-    )
+    return best_result
 
-    # get a tentative value for a column width to resize to
-    col_width = max((max(map(len,n), default=0) for n in inputs), default=0)
-    col_width = max(20, col_width)                              # ensuring headers are not cropped
+def best_match_ipa(
+    sentence_ipa: list[str],
+    transcription: str,
+    beam_width: int|None = None
+    ) -> list[str]:
+    """
+    Finds the pronunciation of the transcription (out of every combination of its words' possible
+    CMUdict pronunciations, as given by to_arpabet_all()) which scores best against the target sentence
 
-    total_score = [0,0]
+    Parameters
+    ----------
+        @param sentence_ipa ( list[str] ): the input IPA (tokenized) of the target sentence
+        @param transcription ( str ): the subject's transcription
+        @param beam_width ( int|None ): if given, the most partial scorings kept after each word (see below)
 
-    (sentences, transcriptions) = [*zip(*inputs)]
+    Returns
+    -------
+        @returns transcription_ipa ( list[str] ): the IPA (tokenized) of the best-scoring pronunciation. if several
+        score the same, the first of them in the order of to_arpabet_all() is returned
+
+    ---
+
+    Summary
+    -------
+    Rather than scoring every combination of pronunciations in full (of which there are exponentially many in
+    the number of words), the words are scored one at a time, carrying forward the best score (and the choice
+    of pronunciations giving it) for each position in the sentence IPA that can be reached. Since the rest of
+    the scoring depends only on that position (see score_transcription()), this finds the best pronunciation
+    exactly, in time linear in the number of words. With a beam_width, only the best beam_width positions are
+    kept after each word, bounding the time taken for very long sentences at the risk of a worse match
+    """
+
+    first_ipa_idx, next_token_idx = _sentence_lookups(sentence_ipa)
+    sentence_ipa_tokens = set(sentence_ipa)
+
+    # positions in the sentence IPA not at an IPA token are equivalent to that of the next one (or its end)
+    def position(s: int) -> int:
+        return len(sentence_ipa) if first_ipa_idx[s] is None else first_ipa_idx[s]
+
+    # each reachable position's best (score, pronunciation choice), where a choice holds the index of each word's
+    # pronunciation. of choices scoring the same, the first in order is kept, as it would be scored first
+    def keep_best(scorings: dict[int, Scoring], s: int, scoring: Scoring):
+        if (s not in scorings) or (scoring[0], scorings[s][1]) > (scorings[s][0], scoring[1]):
+            scorings[s] = scoring
+
+    frontier: dict[int, Scoring] = {position(0): (0, ())}
+    word_options = get_arpabet_options(transcription)
+
+    for options in word_options:
+        new_frontier: dict[int, Scoring] = {}
+
+        for (option_idx, option) in enumerate(options):
+            scorings = frontier
+
+            for token in arpa_to_ipa(option):
+                if not (token.isalpha() and token in sentence_ipa_tokens):
+                    continue
+
+                # take the token as valid (jumping ahead to it) or extraneous, as in score_transcription()
+                next_scorings: dict[int, Scoring] = {}
+                for (s, (score, choice)) in scorings.items():
+                    jump_idx = next_token_idx(token)[s]
+                    if jump_idx is not None:
+                        keep_best(next_scorings, position(jump_idx+1), (score+1, choice))
+                        if jump_idx == s:               # the next IPA token of the sentence is always taken
+                            continue
+
+                    keep_best(next_scorings, s, (score, choice))
+
+                scorings = next_scorings
+
+            for (s, (score, choice)) in scorings.items():
+                keep_best(new_frontier, s, (score, choice + (option_idx,)))
+
+        # prune to the best-scoring positions
+        if beam_width is not None and len(new_frontier) > beam_width:
+            kept = sorted(new_frontier.items(), key = lambda n: (-n[1][0], n[1][1]))[:beam_width]
+            new_frontier = dict(kept)
+
+        frontier = new_frontier
+
+    _, best_choice = min(frontier.values(), key = lambda n: (-n[0], n[1]))
+
+    # build the chosen pronunciation as to_arpabet_all() would
+    arpa_sentence = [""]
+    for (options, option_idx) in zip(word_options, best_choice):
+        arpa_sentence += options[option_idx]
+
+    return arpa_to_ipa(arpa_sentence[:-1])     # remove last added space (see to_arpabet_all())
+
+# a scored target-transcription pair, as plain data (the evaluation is segments_to_rich_text() segments)
+# so that it can be returned from a worker process and written to the workbook by the parent
+class ScoredRow(NamedTuple):
+    sentence: str
+    sentence_ipa: str
+    transcription: str
+    transcription_ipa: str
+    evaluation: RichTextSegments
+    score: int
+    best_poss_score: int
+    score_by_phoneme: list[int]
+
+# how each row is scored, beyond the scoring mode (see score_transcription() and best_match_ipa()), passed
+# from main() down to get_results() for every row (including in worker processes). only a beam_width changes
+# the scores (best-match may then miss the best pronunciation), the rest only how long they take to find
+class ScoringOptions(NamedTuple):
+    scoring_method: ScoringMethod = "table"
+    max_states: int = MEMO_MAX_STATES
+    beam_width: int|None = None
+
+# get the (tokenized) IPA of each target sentence, from its ideal IPA if given
+def get_sentence_ipas(sentences: list[str], ideal_ipa: list[str] = ...) -> list[list[str]]:
     if ideal_ipa is ...:
-        sentence_ipas = [*map(str_to_ipa, sentences)]
-    else:
-        sentence_ipas = [*map(tokenize_ipa, ideal_ipa)]
+        return [*map(str_to_ipa, sentences)]
+
+    return tokenize_many(ideal_ipa)
 
-    phoneme_scores_by_sentence = {}
+def score_inputs(
+    sentences: list[str],
+    sentence_ipas: list[list[str]],
+    transcriptions: list[str],
+    scoring_mode: ScoringMode,
+    options: ScoringOptions = ScoringOptions()
+    ) -> list[ScoredRow]:
+
+    scored_rows = []
 
     # iterate over the target-transcription pairs
-    row=2                                               # doing it this way to use row outside of the loop's scope after
     for (sentence, sentence_ipa, transcription) in zip(sentences, sentence_ipas, transcriptions):
 
         # debug
         # print(f"TARGET: {sentence} | {sentence_ipa}", f"\nSUBJECT: {transcription} | {transcription_ipa}\n\n")
 
-        transcription_ipa, results = get_results(sentence_ipa, transcription, scoring_mode)
+        transcription_ipa, results = get_results(sentence_ipa, transcription, scoring_mode, **options._asdict())
 
         score, best_poss_score, evaluation, score_by_phoneme = output_scoring(                # format the results
             sentence_ipa, transcription_ipa, results
         )
 
-        phoneme_scores_by_sentence[sentence] = score_by_phoneme
+        scored_rows.append(ScoredRow(
+            sentence, "".join(sentence_ipa),
+            transcription, "".join(transcription_ipa),
+            evaluation, score, best_poss_score, score_by_phoneme
+        ))
+
+    return scored_rows
 
-        display_sentence_ipa = "".join(sentence_ipa)
-        display_transcription_ipa = "".join(transcription_ipa)
+def write_scored_rows(ws: Worksheet, scored_rows: list[ScoredRow]) -> None:
+    """
+    Writes a subject's scored rows to a worksheet, under a header and above their total score
 
-        total_score[0] += score
-        total_score[1] += best_poss_score
+    Rows are only ever appended (so that this can write to the write-only worksheets of main(), which
+    stream rows to disk), so every row is formatted first to find the column width, which must be set
+    before any rows are written
+    """
 
-        formatted_score = f"{score}/{best_poss_score}"
-        formatted_evaluation = to_rich_text(evaluation)                     # convert evaluation to rich text
+    # get a tentative value for a column width to resize to
+    col_width = max((max(len(n.sentence), len(n.transcription)) for n in scored_rows), default=0)
+    col_width = max(20, col_width)                              # ensuring headers are not cropped
 
-        fill_row(                                                       # write row to output sheet
-            row, (
-                sentence, display_sentence_ipa,
-                transcription, display_transcription_ipa,
-                formatted_evaluation, formatted_score
-            )
-        )
+    total_score = [0,0]
+    formatted_rows = []
+
+    for scored_row in scored_rows:
+
+        total_score[0] += scored_row.score
+        total_score[1] += scored_row.best_poss_score
+
+        formatted_score = f"{scored_row.score}/{scored_row.best_poss_score}"
+        formatted_evaluation = segments_to_rich_text(scored_row.evaluation) # convert evaluation to rich text
+
+        formatted_rows.append((
+            scored_row.sentence, scored_row.sentence_ipa,
+            scored_row.transcription, scored_row.transcription_ipa,
+            formatted_evaluation, formatted_score
+        ))
 
         # if the length of the evaluation is longer than our defined column width, widen it
         col_width = max(col_width, len(str(formatted_evaluation)))
-        row += 1
-
-    formatted_total_score = f"{total_score[0]}/{total_score[1]}"
-    ws[f"F{row}"] = f"Total Score: {formatted_total_score}"
 
     # set sheet column dimensions
-    dim_holder = dimensions.DimensionHolder(ws)
     for col in "ABCDEF":
-        dim_holder[col] = dimensions.ColumnDimension(
+        ws.column_dimensions[col] = dimensions.ColumnDimension(
             ws, col, width=col_width, bestFit = True
         )
 
-    ws.column_dimensions = dim_holder
+    # write header, rows and total score
+    ws.append((
+        "Source Sentence", "Source IPA",
+        "Transcribed Sentence", "Transcribed IPA",
+        "Autoscore Evaluation", "Autoscore Score"
+    ))
+
+    for formatted_row in formatted_rows:
+        ws.append(formatted_row)
+
+    formatted_total_score = f"{total_score[0]}/{total_score[1]}"
+    ws.append((None, None, None, None, None, f"Total Score: {formatted_total_score}"))
+
+# the statistics that may be added below the subject rows of each PER_SEGMENT sheet, by name: each
+# is a row label and a function of the sentence's (subjects x phonemes) score matrix, giving one value
+# per phoneme. as phoneme scores are 0 or 1, the mean ("AVG") is also the proportion of subjects correct
+SEGMENT_STATS: dict[str, tuple[str, Callable[[np.ndarray], np.ndarray]]] = {
+    "mean":     ("AVG",     lambda m: _round_each(m.mean(axis=0), 2)),
+    "std":      ("STD",     lambda m: _round_each(m.std(axis=0), 2)),
+    "correct":  ("CORRECT", lambda m: m.sum(axis=0).astype(int)),
+    "count":    ("N",       lambda m: np.full(m.shape[1], m.shape[0])),
+}
+
+# rounds as python's round() does, rather than numpy's round-half-to-even on the scaled value
+# (which, e.g., rounds 1/40 = 0.025 down to 0.02 where round() gives 0.03)
+def _round_each(values: np.ndarray, ndigits: int) -> np.ndarray:
+    return np.array([round(value, ndigits) for value in values.tolist()])
+
+def segment_score_matrix(scores_by_subject: Iterable[list[int]]) -> np.ndarray:
+    """
+    Stacks the phoneme scores of each subject for one sentence into a (subjects x phonemes) matrix
+
+    Parameters
+    ----------
+        @param scores_by_subject ( Iterable[list[int]] ): each subject's score_by_phoneme for the sentence
+
+    Returns
+    -------
+        @returns np.ndarray: a float matrix with a row per subject. should subjects have been scored on
+        differing numbers of phonemes, shorter rows are padded with NaN
+    """
+
+    scores_by_subject = [*scores_by_subject]
+    width = max(map(len, scores_by_subject), default=0)
+
+    matrix = np.full((len(scores_by_subject), width), np.nan)
+    for (row, score_by_phoneme) in zip(matrix, scores_by_subject):
+        row[:len(score_by_phoneme)] = score_by_phoneme
+
+    return matrix
+
+def segment_stats(matrix: np.ndarray, stats: Iterable[str] = ("mean",)) -> dict[str, list]:
+    """
+    Computes per-phoneme statistics (see SEGMENT_STATS) over a sentence's score matrix, for the
+    phonemes that every subject was scored on
+
+    Parameters
+    ----------
+        @param matrix ( np.ndarray ): the sentence's score matrix (see segment_score_matrix())
+        @param stats ( Iterable[str] ): the names of the statistics to compute, in order
+
+    Returns
+    -------
+        @returns dict[str, list]: the values of each statistic by its row label
+    """
+
+    scored_by_all = matrix[:, ~np.isnan(matrix).any(axis=0).cumsum().astype(bool)]
+    return {
+        label: func(scored_by_all).tolist()
+        for (label, func) in map(SEGMENT_STATS.__getitem__, stats)
+    }
+
+# writes the per-phoneme scores of each subject for each sentence (and their statistics), one sheet per sentence
+def write_per_segment(
+    out_path: Path,
+    user_sentence_phoneme_scores: dict[str, dict[str, list[int]]],
+    ipa_by_sentence: dict[str, list[str]],
+    stats: Iterable[str] = ("mean",)
+    ) -> None:
+
+    wb = Workbook(write_only=True)
+
+    for (sentence, scores) in user_sentence_phoneme_scores.items():
+        ws = wb.create_sheet(sentence[:31])
+        matrix = segment_score_matrix(scores.values())
+
+        tokens = [*filter(str.isalpha, ipa_by_sentence[sentence])]
+        ws.append((None, *tokens))
+
+        for (col, row) in zip(scores, matrix.tolist()):
+            ws.append((col, *map(int, filter(lambda n: n == n, row))))      # (n == n drops NaN padding)
+
+        for (label, values) in segment_stats(matrix, stats).items():
+            ws.append((label, *values))
+
+    wb.save(out_path)
+
+def process_inputs(
+    inputs: list[tuple[str,str]],
+    ws: Worksheet,
+    scoring_mode: ScoringMode,
+    ideal_ipa: list[str] = ...,
+    sentence_ipas: list[list[str]] = ...
+    ) -> tuple[dict[str, list[int]], list[list[str]]]:
+
+    # the target IPA may be passed in (see get_sentence_ipas()) to avoid recomputing it for every subject
+    (sentences, transcriptions) = [*zip(*inputs)]
+    if sentence_ipas is ...:
+        sentence_ipas = get_sentence_ipas(sentences, ideal_ipa)
+
+    scored_rows = score_inputs(sentences, sentence_ipas, transcriptions, scoring_mode)
+    write_scored_rows(ws, scored_rows)
 
+    phoneme_scores_by_sentence = {n.sentence: n.score_by_phoneme for n in scored_rows}
     return phoneme_scores_by_sentence, sentence_ipas
 
+# each worker process opens its own connection to the CMUdict database (sqlite connections must not be
+# shared between processes), and preloads CMUdict if the parent did (forked workers inherit the parent's
+# preloaded CMUdict, but spawned ones, the default on macOS, start without it)
+def _init_scoring_worker(database_fp: str, preload: bool = False):
+    tokenize_to_ipa.dba = SQLiteDB(database_fp, silent=True)
+    if preload and tokenize_to_ipa.cmudict_preloaded is None:
+        tokenize_to_ipa.preload_cmudict(report=False)
+
+def _score_chunk(args: tuple[list[str], list[list[str]], list[str], ScoringMode, ScoringOptions]) -> list[ScoredRow]:
+    return score_inputs(*args)
+
+def score_subjects(
+    sentences: list[str],
+    sentence_ipas: list[list[str]],
+    subject_transcriptions: dict[str, list[str]],
+    scoring_mode: ScoringMode,
+    jobs: int = 1,
+    result_cache: PersistentCache|None = None,
+    options: ScoringOptions = ScoringOptions()
+    ) -> dict[str, list[ScoredRow]]:
+    """
+    Scores the transcriptions of each subject against the target sentences
+
+    Parameters
+    ----------
+        @param sentences ( list[str] ): the target sentences
+        @param sentence_ipas ( list[list[str]] ): the (tokenized) IPA of each target sentence, as from get_sentence_ipas()
+        @param subject_transcriptions ( dict[str, list[str]] ): each subject's transcription of each target sentence
+        @param scoring_mode ( ScoringMode ): see get_results()
+        @param jobs ( int ): the number of processes to score subjects in (in parallel, if more than 1)
+        @param result_cache ( PersistentCache|None ): if given, rows scored in earlier runs are taken from this
+        cache (by target IPA, transcription and scoring mode) rather than scored again, and new rows are added to it
+        @param options ( ScoringOptions ): how each row is scored (see ScoringOptions)
+
+    Returns
+    -------
+        @returns dict[str, list[ScoredRow]]: each subject's scored rows, in the order of subject_transcriptions
+    """
+
+    return dict(iter_score_subjects(
+        sentences, sentence_ipas, subject_transcriptions, scoring_mode, jobs, result_cache, options=options
+    ))
+
+# raised by iter_score_subjects() (and so main()) when scoring is cancelled
+class ScoringCancelled(Exception): pass
+
+# the lazy equivalent of score_subjects(), yielding each subject's scored rows (in order) as soon as they
+# are all scored, so that each can be written out and discarded without holding every subject's rows at once
+# (a row shared between subjects is held until the last of them is yielded).
+# if given a stats dict, fills it with the number of rows, unique rows and rows from the cache.
+# if given a progress callback, calls it with the number of rows scored so far and the total as
+# scoring goes, and if given a cancelled callback, raises ScoringCancelled once it returns True
+def iter_score_subjects(
+    sentences: list[str],
+    sentence_ipas: list[list[str]],
+    subject_transcriptions: dict[str, list[str]],
+    scoring_mode: ScoringMode,
+    jobs: int = 1,
+    result_cache: PersistentCache|None = None,
+    stats: dict[str, int]|None = None,
+    progress: Callable[[int, int], None]|None = None,
+    cancelled: Callable[[], bool]|None = None,
+    options: ScoringOptions = ScoringOptions()
+    ) -> Iterator[tuple[str, list[ScoredRow]]]:
+
+    # identical (target IPA, transcription) pairs are scored once, for every subject that gave them.
+    # transcriptions are compared lowercased, as case makes no difference to scoring
+    pair_idxs: dict[tuple, int] = {}
+    unique_pairs: list[tuple[int, str]] = []                # the (sentence index, transcription) of each pair
+    subject_pair_idxs: dict[str, list[int]] = {}
+    subject_pairs_end: dict[str, int] = {}                  # one past the last pair each subject gave first
+
+    for (subject, transcriptions) in subject_transcriptions.items():
+        subject_pair_idxs[subject] = []
+
+        for (i, transcription) in enumerate(transcriptions):
+            pair = (tuple(sentence_ipas[i]), _normalize_transcription(transcription))
+            if pair not in pair_idxs:
+                pair_idxs[pair] = len(unique_pairs)
+                unique_pairs.append((i, transcription))
+
+            subject_pair_idxs[subject].append(pair_idxs[pair])
+
+        subject_pairs_end[subject] = len(unique_pairs)
+
+    # the number of rows each pair is scored for, to report progress in rows
+    rows_per_pair = [0]*len(unique_pairs)
+    for pair_idx in chain.from_iterable(subject_pair_idxs.values()):
+        rows_per_pair[pair_idx] += 1
+
+    rows_done, total_rows = 0, sum(rows_per_pair)
+    if stats is not None:
+        stats |= {"rows": total_rows, "unique": len(unique_pairs), "cached": 0}
+    if progress is not None:
+        progress(rows_done, total_rows)
+
+    # pairs already in the result cache are not scored again (only the parent process uses the cache).
+    # which are cached is checked up front, to plan the scoring, but rows are loaded chunk by chunk
+    keys: list[str] = []
+    is_cached = [False]*len(unique_pairs)
+    if result_cache is not None:
+        keys = [
+            _result_key(sentence_ipas[i], _normalize_transcription(transcription), scoring_mode, options.beam_width)
+            for (i, transcription) in unique_pairs
+        ]
+        cached_keys = result_cache.contains_many(keys)
+        is_cached = [key in cached_keys for key in keys]
+
+    # pairs are numbered in order of the first subject to give them, so are scored in that order, in
+    # chunks small enough to report progress, check for cancellation and yield each subject as soon as
+    # its last new pair is scored (split between processes if jobs > 1, a few chunks per process)
+    chunk_size = PROGRESS_CHUNK_SIZE
+    if jobs > 1:
+        chunk_size = max(1, min(chunk_size, -(-(len(unique_pairs) - sum(is_cached)) // (4*jobs))))
+
+    chunks = [range(n, min(n+chunk_size, len(unique_pairs))) for n in range(0, len(unique_pairs), chunk_size)]
+
+    def lookup_chunk(chunk: range) -> tuple[dict[int, ScoredRow], list[int]]:
+        if result_cache is None:
+            return ({}, [*chunk])
+
+        found = result_cache.get_many(keys[pair_idx] for pair_idx in chunk)
+        cached_rows = {
+            pair_idx: _restore_result(sentences[unique_pairs[pair_idx][0]], unique_pairs[pair_idx][1], found[keys[pair_idx]])
+            for pair_idx in chunk if keys[pair_idx] in found
+        }
+        return (cached_rows, [pair_idx for pair_idx in chunk if pair_idx not in cached_rows])
+
+    def make_task(to_score: list[int]) -> tuple[list[str], list[list[str]], list[str], ScoringMode, ScoringOptions]:
+        return (
+            [sentences[unique_pairs[pair_idx][0]] for pair_idx in to_score],
+            [sentence_ipas[unique_pairs[pair_idx][0]] for pair_idx in to_score],
+            [unique_pairs[pair_idx][1] for pair_idx in to_score],
+            scoring_mode,
+            options
+        )
+
+    # (a pool is only worth starting if more than one chunk has pairs to score)
+    chunks_to_score = sum(not all(is_cached[pair_idx] for pair_idx in chunk) for chunk in chunks)
+
+    executor = None
+    if jobs > 1 and chunks_to_score > 1:
+        executor = ProcessPoolExecutor(
+            max_workers=min(jobs, chunks_to_score),
+            initializer=_init_scoring_worker,
+            initargs=(tokenize_to_ipa.get_dba().path, tokenize_to_ipa.cmudict_preloaded is not None)
+        )
+
+    # the (chunk, cached rows, pairs scored, their rows) of each chunk in turn. with processes, a few chunks
+    # per process are kept in flight ahead of the one being yielded, rather than every chunk at once
+    def iter_scored_chunks() -> Iterator[tuple[range, dict[int, ScoredRow], list[int], list[ScoredRow]]]:
+        if executor is None:
+            for chunk in chunks:
+                (cached_rows, to_score) = lookup_chunk(chunk)
+                yield (chunk, cached_rows, to_score, _score_chunk(make_task(to_score)) if to_score else [])
+            return
+
+        pending = deque()
+        for chunk in chunks:
+            (cached_rows, to_score) = lookup_chunk(chunk)
+            future = executor.submit(_score_chunk, make_task(to_score)) if to_score else None
+            pending.append((chunk, cached_rows, to_score, future))
+
+            while pending and (len(pending) > 2*jobs or chunk is chunks[-1]):
+                (done_chunk, cached_rows, to_score, future) = pending.popleft()
+                yield (done_chunk, cached_rows, to_score, [] if future is None else future.result())
+
+    # rows are let go once every subject that needs them has been yielded
+    subjects = deque(subject_transcriptions)
+    pair_rows: dict[int, ScoredRow] = {}
+    uses_left = rows_per_pair.copy()
+
+    # yields (in order) each subject whose pairs have all been scored
+    def yield_ready(pairs_done: int) -> Iterator[tuple[str, list[ScoredRow]]]:
+        while subjects and subject_pairs_end[subjects[0]] <= pairs_done:
+            subject = subjects.popleft()
+            (transcriptions, pair_idxs) = (subject_transcriptions[subject], subject_pair_idxs.pop(subject))
+
+            yield (subject, [
+                pair_rows[pair_idx]._replace(sentence=sentences[i], transcription=transcriptions[i])
+                for (i, pair_idx) in enumerate(pair_idxs)
+            ])
+
+            for pair_idx in pair_idxs:
+                uses_left[pair_idx] -= 1
+                if uses_left[pair_idx] == 0:
+                    del pair_rows[pair_idx]
+
+    try:
+        yield from yield_ready(0)
+
+        for (chunk, cached_rows, to_score, rows) in iter_scored_chunks():
+            new_rows = dict(zip(to_score, rows))
+
+            # new rows are cached as they are scored, so that they are kept even if scoring is cancelled
+            if result_cache is not None and new_rows:
+                result_cache.put_many( (keys[pair_idx], _cached_result(row)) for (pair_idx, row) in new_rows.items() )
+
+            pair_rows |= cached_rows | new_rows
+            rows_done += sum(rows_per_pair[pair_idx] for pair_idx in chunk)
+            if stats is not None:
+                stats["cached"] += len(cached_rows)
+
+            if progress is not None:
+                progress(rows_done, total_rows)
+            if cancelled is not None and rows_done < total_rows and cancelled():
+                raise ScoringCancelled(f"Scoring cancelled after {rows_done}/{total_rows} rows")
+
+            yield from yield_ready(chunk.stop)
+
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+# case only affects scoring through CMUdict lookups, which are case-insensitive
+def _normalize_transcription(transcription: str) -> str:
+    return transcription.lower() if isinstance(transcription, str) else transcription
+
+# the cache key of a scored row, and the parts of it that are cached (the rest are part of its key).
+# a beam width is only part of the key where it can change the result, so exact results share keys
+def _result_key(sentence_ipa: list[str], transcription: str, scoring_mode: ScoringMode, beam_width: int|None = None) -> str:
+    if scoring_mode == "best-match" and beam_width is not None:
+        return PersistentCache.make_key(SCORER_VERSION, sentence_ipa, transcription, scoring_mode, beam_width)
+
+    return PersistentCache.make_key(SCORER_VERSION, sentence_ipa, transcription, scoring_mode)
+
+def _cached_result(scored_row: ScoredRow) -> dict:
+    return {
+        field: value for (field, value) in scored_row._asdict().items()
+        if field not in ("sentence", "transcription")
+    }
+
+# the inverse of _cached_result() (JSON has no tuples, so the evaluation's segments are lists when cached)
+def _restore_result(sentence: str, transcription: str, cached_result: dict) -> ScoredRow:
+    evaluation = [*map(tuple, cached_result["evaluation"])]
+    return ScoredRow(sentence, transcription=transcription, **(cached_result | {"evaluation": evaluation}))
+
+# raised when an input file can't be scored alongside the others (the message is fit to show the user)
+class MalformedInputError(Exception): pass
+
+def validate_df(fn: str, subject_df: pd.DataFrame, compare_to: pd.DataFrame|None = None) -> None:
+    """
+    Checks that a subject's DataFrame can be scored alongside another (i.e. has the same target
+    sentences), sorting it by its targets in place. Details of any problem are printed
+
+    Parameters
+    ----------
+        @param fn ( str ): the name of the subject's file, for reporting
+        @param subject_df ( pd.DataFrame ): the subject's data, which must have a 'Target' column
+        @param compare_to ( pd.DataFrame|None ): the (sorted) data to compare to, if any
+
+    Raises
+    ------
+        @raises MalformedInputError: if the DataFrame has no 'Target' column or its targets differ
+    """
+
+    if "Target" not in subject_df.columns:
+        print(f"[ERROR-INFO] did not find column 'Target' in file '{fn}'")
+        raise MalformedInputError(
+            "[ERROR]: Malformed input file: Must contain column 'Target' (see terminal for details)"
+        )
+
+    subject_df.sort_values(by=["Target"], inplace=True, ignore_index = True)
+    if compare_to is None:
+        return
+
+    # validating df lengths
+    if (l1:=len(compare_to.index)) != (l2:=len(subject_df.index)):
+        print(f"[ERROR-INFO]: Conflict in file row lengths: found {l1} and {l2}")
+        raise MalformedInputError(
+            "[ERROR]: All subject files must have the same number of sentences (see terminal for details)"
+        )
+
+    # ensuring target sentences match in both dfs
+    if not all((t1:=compare_to["Target"]) == (t2:=subject_df["Target"])):
+        print(f"[ERROR-INFO]: Conflict in file sentences: found \n\t{t1} and \n\t{t2}")
+        raise MalformedInputError(
+            "[ERROR]: All subject files must have the same list of target sentences (see terminal for details)"
+        )
+
+# reads subject files one at a time, validating each against the first (see validate_df())
+def iter_subject_dfs(input_files: Iterable[tuple[str, Path]]) -> Iterator[tuple[Path, pd.DataFrame]]:
+    first_df = None
+    for (fn, fp) in input_files:
+        subject_df = pd.read_excel(fp, header=0)
+        validate_df(fn, subject_df, first_df)
+
+        if first_df is None:
+            first_df = subject_df
+
+        yield (Path(fp), subject_df)
+
+# combines subject files (each with a Target column and one subject's column) into one DataFrame
+def combine_subject_dfs(input_files: Iterable[tuple[str, Path]]) -> pd.DataFrame:
+    df = None
+    for (_, subject_df) in iter_subject_dfs(input_files):
+        if df is None:
+            df = subject_df
+            continue
+
+        subj_header = subject_df.columns[1]
+        df[subj_header] = subject_df[subj_header]
+
+    return df
+
+# reads an ideal IPA file (of target sentences and their IPA) into a list of IPA in subject_df's order
+def read_ideal_ipa(fn: str, fp: Path, subject_df: pd.DataFrame) -> list[str]:
+    ideal_ipas_df = pd.read_excel(fp, header=0)
+    ideal_ipas_df.columns = ["Target", "IPA"]
+
+    validate_df("IDEAL IPA FILE: "+fn, ideal_ipas_df, subject_df)
+    return [*ideal_ipas_df["IPA"]]
+
 def main(
     df: pd.DataFrame = ...,
     out_dir: str = ...,
     out_fn: str = ...,
     ideal_ipa: list[str] = ...,
-    scoring_mode: ScoringMode = "preferred-transcription"
-    ):
-
-    root = Tk()
-    root.withdraw()
-
-    wb = Workbook()
-    wb.remove(wb.active)
-
-    if df is None:
-        fp = Path(askopenfilename(
+    scoring_mode: ScoringMode = "preferred-transcription",
+    jobs: int = 1,
+    report_timing: bool = False,
+    result_cache: str|Path|None = None,
+    per_segment_stats: Iterable[str] = ("mean",),
+    progress: Callable[[int, int], None]|None = None,
+    cancelled: Callable[[], bool]|None = None,
+    preload: bool = False,
+    options: ScoringOptions = ScoringOptions()
+    ) -> Path|None:
+
+    # progress and cancelled are passed on to iter_score_subjects(), which calls progress with the number of
+    # rows scored so far (and the total), and raises ScoringCancelled (with no output written) if cancelled.
+    # if preload is set, the whole of CMUdict is loaded up front (and by each worker process, if jobs > 1)
+    # rather than looked up word by word (see tokenize_to_ipa.preload_cmudict()), for large runs.
+    # options (see ScoringOptions) are passed on to the scoring of every row
+
+    # prints the time taken by each stage of the run if report_timing is set
+    stage_start = perf_counter()
+    def report_stage(stage: str, note: str = ""):
+        nonlocal stage_start
+        elapsed, stage_start = perf_counter() - stage_start, perf_counter()
+        if report_timing:
+            print(f"[TIMING]: {stage}: {elapsed:.3f}s{note}")
+
+    wb = Workbook(write_only=True)      # rows are streamed to disk as they are written
+
+    # tkinter is only imported to prompt for an input file, so that headless runs never import it
+    if df is ...:
+        from tkinter import Tk
+        from tkinter.filedialog import askopenfilename
+
+        root = Tk()
+        root.withdraw()
+
+        fp = askopenfilename(
             filetypes=[("Excel Files", ".xlsx")]
-        ))
+        )
 
         # aborted during filedialog
         if fp == "": return
+        fp = Path(fp)
 
-        if out_dir is None:
+        if out_dir is ...:
             out_dir = fp.parent
 
-        if out_fn is None:
+        if out_fn is ...:
             out_fn = fp.name[:-5] + "_autoscored"
 
         df = pd.read_excel(fp)
 
     df.fillna("", inplace=True)
+    subject_cols = [*df.columns[1:]]
+    report_stage("Reading input")
 
+    if preload and tokenize_to_ipa.cmudict_preloaded is None:
+        tokenize_to_ipa.preload_cmudict(report=report_timing)
+        report_stage("Preloading CMUdict")
+
+    # the target sentences are the same for every subject (see validate_df()),
+    # so their IPA is found once for the run and shared by every column and PER_SEGMENT
     target = [ts.strip() for ts in df["Target"]] # get target sentences
+    sentence_ipas = get_sentence_ipas(target, ideal_ipa)
+    ipa_by_sentence = dict(zip(target, sentence_ipas))
+
+    ipa_time = perf_counter() - stage_start
+    report_stage(
+        "Target IPA (once per run)",
+        f", saving ~{ipa_time*(len(subject_cols)-1):.3f}s over once per subject ({len(subject_cols)} subjects)"
+    )
 
-    user_sentence_phoneme_scores: dict[str, dict[str,str|list[int]]] = {}
-    # iterate through subject columns
-    for col in df.columns[1:]:
-        ws = wb.create_sheet(col)
+    # rows scored in earlier runs are reused from the result cache file, if given
+    cache = None if result_cache is None else PersistentCache(result_cache)
 
-        inputs: list[tuple[str,str]] = [ *zip(target, df[col]) ]
-        phoneme_scores_by_sentence, sentence_ipas = process_inputs(inputs, ws, scoring_mode, ideal_ipa)    # write to worksheet & return phoneme scores
+    # score subject columns (in parallel if jobs > 1), writing each to its sheet in turn
+    subject_transcriptions = {col: [*df[col]] for col in subject_cols}
+    scoring_stats = {}
+    scored_subjects = iter_score_subjects(
+        target, sentence_ipas, subject_transcriptions, scoring_mode, jobs, cache, scoring_stats, progress, cancelled,
+        options
+    )
+
+    user_sentence_phoneme_scores: dict[str, dict[str,list[int]]] = {}
+    try:
+        # iterate through subject columns
+        for (col, scored_rows) in scored_subjects:
+            ws = wb.create_sheet(col)
+            write_scored_rows(ws, scored_rows)
 
-        for (sentence, score) in phoneme_scores_by_sentence.items():
-            user_sentence_phoneme_scores.setdefault(sentence, {})
-            user_sentence_phoneme_scores[sentence][col] = score
+            for scored_row in scored_rows:
+                user_sentence_phoneme_scores.setdefault(scored_row.sentence, {})
+                user_sentence_phoneme_scores[scored_row.sentence][col] = scored_row.score_by_phoneme
+    finally:
+        if cache is not None:
+            cache.close()
 
     outpath = Path(out_dir, f"{out_fn}.xlsx")
     wb.save(outpath)
+    cache_note = ""
+    if cache is not None:
+        cache_note = f", {scoring_stats['cached']}/{scoring_stats['unique']} unique rows from result cache"
+
+    report_stage(f"Scoring ({jobs} job{'s'*(jobs != 1)}) and writing workbook", cache_note)
 
-    with pd.ExcelWriter(Path(out_dir, f"{out_fn}_PER_SEGMENT.xlsx"), engine="openpyxl") as writer:
-        for (i, (sentence,scores)) in enumerate(user_sentence_phoneme_scores.items()):
-            avg = lambda l: round(sum(l)/len(l), 2)
-            scores["AVG"] = [*map(avg, zip(*scores.values()))]
+    rows, unique_rows = scoring_stats["rows"], scoring_stats["unique"]
+    print(
+        f"[INFO]: Scored {unique_rows} unique (target, transcription) pairs for {rows} rows "
+        f"(dedup ratio {rows/max(unique_rows, 1):.2f}x)"
+    )
+
+    write_per_segment(
+        Path(out_dir, f"{out_fn}_PER_SEGMENT.xlsx"), user_sentence_phoneme_scores, ipa_by_sentence, per_segment_stats
+    )
+    report_stage("Writing PER_SEGMENT workbook")
 
-            tokens = [*filter(str.isalpha, sentence_ipas[i])]
-            df = pd.DataFrame(scores, index=tokens).T
-        
-            df.to_excel(writer, sheet_name=sentence[:31])
+    return outpath
     
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,199 @@
+from argparse import ArgumentParser, RawTextHelpFormatter
+from textwrap import dedent
+from pathlib import Path
+from sys import exit
+from time import perf_counter
+from spl_widgets.util.import_util import lazy_import
+
+# NB: nothing here (or in autoscore) may import tkinter, so that this can run on machines without a display
+autoscore = lazy_import("spl_widgets.autoscorer.autoscore")
+
+# the values of autoscore.ScoringMode and autoscore.ScoringMethod
+SCORING_MODES = ("preferred-transcription", "best-match")
+SCORING_METHODS = ("table", "memo")
+
+def make_parser():
+    parser_desc = "A headless companion to autoscorer, scores subject files without the GUI or any file dialogs."
+    parser = ArgumentParser(prog="autoscorer_batch",
+        description=parser_desc,
+        formatter_class=RawTextHelpFormatter
+    )
+
+    inputs_help = dedent("""\
+        Paths to subject .xlsx files (or directories of them) to score. Each must have a 'Target'
+        column of target sentences followed by a column of the subject's transcriptions, and all
+        must have the same target sentences.\
+    """)
+    parser.add_argument(
+        "inputs", metavar="F", type=str, nargs="+",
+        help=inputs_help
+    )
+
+    ideal_ipa_help = dedent("""\
+        Path to an ideal IPA .xlsx file, of the target sentences and their IPA transcriptions.
+        If not provided, the IPA of the target sentences is found with CMUdict.\
+    """)
+    parser.add_argument(
+        "-i", "--ideal-ipa", metavar="I", type=str,
+        help=ideal_ipa_help
+    )
+
+    mode_help = dedent("""\
+        The scoring mode to use. Defaults to 'best-match' if an ideal IPA file is passed,
+        and to 'preferred-transcription' otherwise (as in autoscorer).\
+    """)
+    parser.add_argument(
+        "-m", "--mode", choices=SCORING_MODES,
+        help=mode_help
+    )
+
+    scoring_method_help = dedent("""\
+        How each transcription's best score is found. 'table' (the default) scores every
+        subproblem; 'memo' scores only those reached, which is faster for most transcriptions,
+        falling back to 'table' for any needing more than --max-states subproblems.\
+    """)
+    parser.add_argument(
+        "--scoring-method", choices=SCORING_METHODS, default="table",
+        help=scoring_method_help
+    )
+
+    parser.add_argument(
+        "--max-states", metavar="N", type=int,
+        help="The most subproblems the 'memo' scoring method may score for one transcription (default 100000)."
+    )
+
+    beam_width_help = dedent("""\
+        With 'best-match' scoring, keep only the best N partial pronunciations after each word,
+        rather than finding the best-matching pronunciation exactly. Faster for very long
+        transcriptions, but may score lower than the exact best match.\
+    """)
+    parser.add_argument(
+        "--beam-width", metavar="N", type=int,
+        help=beam_width_help
+    )
+
+    out_dir_help = dedent("""\
+        Directory to write the autoscored files to (created if it does not exist).
+        Defaults to the current directory.\
+    """)
+    parser.add_argument(
+        "-o", "--out-dir", metavar="D", type=str, default=".",
+        help=out_dir_help
+    )
+
+    out_fn_help = dedent("""\
+        Name (without extension) of the combined output file. Defaults to 'autoscored'.
+        Ignored with --separate.\
+    """)
+    parser.add_argument(
+        "-n", "--out-fn", metavar="N", type=str, default="autoscored",
+        help=out_fn_help
+    )
+
+    separate_help = dedent("""\
+        Score each subject file separately (to <file name>_autoscored.xlsx), reading one file
+        at a time, rather than combining every subject into one output file.\
+    """)
+    parser.add_argument(
+        "-s", "--separate", action="store_true",
+        help=separate_help
+    )
+
+    jobs_help = dedent("""\
+        Number of processes to score with. Defaults to 1 (score in this process).\
+    """)
+    parser.add_argument(
+        "-j", "--jobs", metavar="N", type=int, default=1,
+        help=jobs_help
+    )
+
+    cache_help = dedent("""\
+        Path to a result cache file, so that (target, transcription) pairs scored in earlier
+        runs are not scored again. Created if it does not exist.\
+    """)
+    parser.add_argument(
+        "-c", "--cache", metavar="C", type=str,
+        help=cache_help
+    )
+
+    preload_help = dedent("""\
+        Load the whole of CMUdict up front (in each process, with --jobs), rather than looking
+        words up as they are needed. Takes around a second, so is worthwhile for large runs.\
+    """)
+    parser.add_argument(
+        "-p", "--preload", action="store_true",
+        help=preload_help
+    )
+
+    parser.add_argument(
+        "-t", "--timing", action="store_true",
+        help="Print the time taken by each stage of scoring."
+    )
+
+    return parser
+
+# expands any directories among the inputs to the .xlsx files they contain
+def get_input_files(inputs: list[str]) -> list[tuple[str, Path]]:
+    input_fps = []
+    for inp in map(Path, inputs):
+        if inp.is_dir():
+            input_fps.extend(sorted(fp for fp in inp.glob("*.xlsx") if not fp.name.startswith("~$")))
+        elif inp.is_file():
+            input_fps.append(inp)
+        else:                                               # bad filepath, bail
+            raise ValueError(f"[Error] invalid filepath to subject file: {inp}")
+
+    return [(fp.name, fp) for fp in input_fps]
+
+def main(argv: list[str]|None = None):
+    parser = make_parser()
+    args = parser.parse_args(argv)
+    if args.beam_width is not None and args.beam_width < 1:
+        parser.error("--beam-width must be at least 1")
+
+    input_files = get_input_files(args.inputs)
+    if input_files == []:
+        print("[Error]: No subject files found!")
+        exit(1)
+
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    options = autoscore.ScoringOptions(args.scoring_method, beam_width=args.beam_width)
+    if args.max_states is not None:
+        options = options._replace(max_states=args.max_states)
+
+    score_args = {"jobs": args.jobs, "report_timing": args.timing, "result_cache": args.cache, "preload": args.preload, "options": options}
+    start = perf_counter()
+
+    try:
+        if args.separate:
+            # each file is read, scored and written before the next is read
+            ideal_ipa = ...
+            for (fp, subject_df) in autoscore.iter_subject_dfs(input_files):
+                if args.ideal_ipa is not None and ideal_ipa is ...:
+                    ideal_ipa = autoscore.read_ideal_ipa(Path(args.ideal_ipa).name, args.ideal_ipa, subject_df)
+
+                scoring_mode = args.mode or ("preferred-transcription" if ideal_ipa is ... else "best-match")
+                print(f"[INFO]: Scoring {fp.name}")
+                autoscore.main(subject_df, out_dir, f"{fp.stem}_autoscored", ideal_ipa, scoring_mode, **score_args)
+
+        else:
+            df = autoscore.combine_subject_dfs(input_files)
+
+            ideal_ipa = ...
+            if args.ideal_ipa is not None:
+                ideal_ipa = autoscore.read_ideal_ipa(Path(args.ideal_ipa).name, args.ideal_ipa, df)
+
+            scoring_mode = args.mode or ("preferred-transcription" if ideal_ipa is ... else "best-match")
+            print(f"[INFO]: Scoring {len(input_files)} subject files together")
+            autoscore.main(df, out_dir, args.out_fn, ideal_ipa, scoring_mode, **score_args)
+
+    except autoscore.MalformedInputError as e:
+        print(e)
+        exit(1)
+
+    print(f"[INFO]: Scored {len(input_files)} subject files in {perf_counter()-start:.2f}s, output in {out_dir.resolve()}")
+
+if __name__ == "__main__":
+    main()
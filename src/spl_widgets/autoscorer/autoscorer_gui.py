@@ -4,10 +4,13 @@ from tkinterdnd2 import TkinterDnD
 
 from pathlib import Path
 from subprocess import run
+from threading import Thread, Event
+from queue import Queue, Empty
+from time import perf_counter
 import re
 import pandas as pd
 
-import pkg_resources
+from importlib.resources import files
 import json
 
 from spl_widgets.util.gui_util import RadioFrame, MarginListBox, HelpLinkLabel, HelpTextParser, NOTEBOOK_TAB_WIDTH
@@ -15,12 +18,23 @@ from spl_widgets.autoscorer import autoscore
 
 HL = "*"*29
 
+# how often (in ms) the GUI checks the scoring thread's queue for progress and output
+POLL_INTERVAL_MS = 100
+
+# the arguments of one call to autoscore.main() (df, out_dir, out_fn, ideal_ipa, scoring_mode)
+ScoringJob = tuple[pd.DataFrame, Path, str, list[str], str]
+
 class AutoscorerGUI:
     scoring_mode_radios: RadioFrame
     input_data_listbox: MarginListBox
     ideal_ipa_listbox: MarginListBox
     output_data_listbox: MarginListBox
 
+    # scoring runs on a worker thread, which reports to the GUI only through this queue
+    scoring_thread: Thread|None = None
+    scoring_queue: Queue
+    cancel_event: Event
+
     def __init__(self, master: tk.Tk):
         self.master = master
 
@@ -38,104 +52,53 @@ class AutoscorerGUI:
             message = msg
         )
 
-    @staticmethod
-    def validate_df(fn: str, subject_df: pd.DataFrame, compare_to: pd.DataFrame):
-
-            if "Target" not in subject_df.columns:
-                print(f"[ERROR-INFO] did not find column 'Target' in file '{fn}'")
-                AutoscorerGUI.show_error_popup(
-                    "[ERROR]: Malformed input file: Must contain column 'Target' (see terminal for details)"
-                )
-                return False
-
-            subject_df.sort_values(by=["Target"], inplace=True, ignore_index = True)
-
-            # validating df lengths
-            if (l1:=len(compare_to.index)) != (l2:=len(subject_df.index)):
-                print(f"[ERROR-INFO]: Conflict in file row lengths: found {l1} and {l2}")
-                AutoscorerGUI.show_error_popup(
-                    "[ERROR]: All subject files must have the same number of sentences (see terminal for details)"
-                )
-                return False
-
-            # ensuring target sentences match in both dfs
-            if not all((t1:=compare_to["Target"]) == (t2:=subject_df["Target"])):
-                print(f"[ERROR-INFO]: Conflict in file sentences: found \n\t{t1} and \n\t{t2}")
-                AutoscorerGUI.show_error_popup(
-                    "[ERROR]: All subject files must have the same list of target sentences (see terminal for details)"
-                )
-                return False
-
-            return True
-
     def get_ideal_ipas(self, subject_df: pd.DataFrame, ideal_ipa_path: tuple[str, Path] = ...) -> tuple[str, list[str]]:
         scoring_mode = "preferred-transcription"
         ideal_ipas = ...
             
         if ideal_ipa_path is not ...:
             (fn, fp) = ideal_ipa_path
-            ideal_ipas_df = pd.read_excel(fp, header=0)
-            ideal_ipas_df.columns = ["Target", "IPA"]
 
-            if self.validate_df("IDEAL IPA FILE: "+fn, ideal_ipas_df, subject_df):
+            try:
+                ideal_ipas = autoscore.read_ideal_ipa(fn, fp, subject_df)
                 scoring_mode = "best-match"
-                ideal_ipas = ideal_ipas_df["IPA"]
+            except autoscore.MalformedInputError as e:
+                self.show_error_popup(str(e))
         
         return (scoring_mode, ideal_ipas)
 
     def process_output_combined(self, input_files: dict[str, Path], ideal_ipa_path: tuple[str, Path] = ...):
-        df = None
-        for (fn, fp) in input_files:
-            subject_df = pd.read_excel(fp, header=0)
-
-            if df is None:
-                subject_df.sort_values(by=["Target"], inplace=True, ignore_index = True)
-                df = subject_df
-                continue
-
-            if self.validate_df(fn, subject_df, df) == False:
-                return
-
-            subj_header = subject_df.columns[1]
-            subj_transcriptions = subject_df[subj_header]
-            df[subj_header] = subj_transcriptions
+        try:
+            df = autoscore.combine_subject_dfs(input_files)
+        except autoscore.MalformedInputError as e:
+            self.show_error_popup(str(e))
+            return
 
         (scoring_mode, ideal_ipas) = self.get_ideal_ipas(df, ideal_ipa_path)
 
-        outpath = Path(filedialog.asksaveasfilename(
+        outpath = filedialog.asksaveasfilename(
             filetypes = [("Excel Files", "*.xlsx")],
             title = "Save Autoscorer Output to File"
-        ))
+        )
         if outpath == "":
             self.show_error_popup("[EXIT]: User bailed while saving autoscored file")
             return False
 
+        outpath = Path(outpath)
         out_dir = outpath.parent
         out_fn = outpath.stem
 
-        autoscore.main( df, out_dir, out_fn, ideal_ipas, scoring_mode )
+        self.start_scoring([( df, out_dir, out_fn, ideal_ipas, scoring_mode )])
 
-        self.output_data_listbox.add_item(outpath)
-        self.output_data_listbox.insert(tk.END, HL) # horizontal line separating output batches
-
-    def process_output_separate(self, input_files: list[tuple[str, Path]]):
-
-        frames = []
-        for (fn, fp) in input_files:
-            subject_df = pd.read_excel(fp, header=0)
-
-            if frames == []:
-                subject_df.sort_values(by=["Target"], inplace=True, ignore_index = True)
-                frames.append((fp.stem, subject_df))
-                continue
- 
-            if self.validate_df(fn, subject_df, frames[0][1]) == False:
-                return
+    def process_output_separate(self, input_files: list[tuple[str, Path]], ideal_ipa_path: tuple[str, Path] = ...):
 
-            frames.append((fp.stem, subject_df))
+        try:
+            frames = [(fp.stem, subject_df) for (fp, subject_df) in autoscore.iter_subject_dfs(input_files)]
+        except autoscore.MalformedInputError as e:
+            self.show_error_popup(str(e))
+            return
 
-        if self.ideal_ipa_listbox.size() == 0:
-            ideal_ipas = ...
+        (scoring_mode, ideal_ipas) = self.get_ideal_ipas(frames[0][1], ideal_ipa_path)
 
         output_dir = filedialog.askdirectory(
             title="Directory to save output files in"
@@ -144,17 +107,110 @@ class AutoscorerGUI:
             self.show_error_popup("[EXIT]: User bailed while selecting output directory for autoscored files")
             return False
         
-        for (fn, df) in frames:
-            out_fn = f"{fn}_autoscored"
-            autoscore.main(df, output_dir, out_fn, ideal_ipas)
+        self.start_scoring([
+            (df, Path(output_dir), f"{fn}_autoscored", ideal_ipas, scoring_mode)
+            for (fn, df) in frames
+        ])
+
+    def start_scoring(self, jobs: list[ScoringJob]):
+        """
+        Scores each job (see autoscore.main()) in turn on a worker thread, so that the GUI stays
+        responsive. Progress, output files and errors are passed back through scoring_queue, which
+        poll_scoring() reads on the main thread (tkinter must only be used from the main thread)
+        """
+
+        self.scoring_queue = Queue()
+        self.cancel_event = Event()
+
+        # the total rows of every job, for one progress bar over the whole batch
+        self.job_rows = [len(df.index) * (len(df.columns)-1) for (df, *_) in jobs]
+        self.job_rows_done = [0]*len(jobs)
+        self.scoring_start = perf_counter()
+
+        self.autoscore_button.configure(state="disabled")
+        self.cancel_button.configure(state="normal")
+        self.progress_bar.configure(maximum=max(sum(self.job_rows), 1), value=0)
+        self.status_text.set(f"Scoring {len(jobs)} file(s)...")
+
+        self.scoring_thread = Thread(
+            target=self.score_jobs, args=(jobs, self.scoring_queue, self.cancel_event), daemon=True
+        )
+        self.scoring_thread.start()
+        self.master.after(POLL_INTERVAL_MS, self.poll_scoring)
+
+    # runs on the worker thread, so must not touch any widgets. the last message is always one of
+    # ("done",), ("cancelled", message) or ("error", message)
+    @staticmethod
+    def score_jobs(jobs: list[ScoringJob], scoring_queue: Queue, cancel_event: Event):
+        try:
+            for (job_idx, job) in enumerate(jobs):
+                report_progress = lambda done, total: scoring_queue.put(("progress", job_idx, done, total))
+                outpath = autoscore.main(*job, progress=report_progress, cancelled=cancel_event.is_set)
 
-            outfp = Path(output_dir, out_fn+".xlsx")
-            self.output_data_listbox.add_item(outfp)
+                scoring_queue.put(("output", outpath))
+        except autoscore.ScoringCancelled as e:
+            return scoring_queue.put(("cancelled", str(e)))
+        except Exception as e:
+            return scoring_queue.put(("error", repr(e)))
 
-        self.output_data_listbox.insert(tk.END, HL)
+        scoring_queue.put(("done",))
+
+    def poll_scoring(self):
+        try:
+            while True:
+                (kind, *msg) = self.scoring_queue.get_nowait()
+
+                if kind == "progress":
+                    (job_idx, done, total) = msg
+                    self.job_rows[job_idx], self.job_rows_done[job_idx] = total, done
+                    self.update_progress()
+
+                elif kind == "output":
+                    self.output_data_listbox.add_item(msg[0])
+
+                elif kind == "done":
+                    elapsed = perf_counter() - self.scoring_start
+                    total_rows = sum(self.job_rows)
+                    self.status_text.set(f"Done: {total_rows} rows in {elapsed:.1f}s ({total_rows/elapsed:.1f} rows/sec)")
+                    return self.finish_scoring()
+
+                elif kind == "cancelled":
+                    self.status_text.set(f"[CANCELLED]: {msg[0]}")
+                    return self.finish_scoring()
+
+                elif kind == "error":
+                    self.status_text.set("[ERROR]: Scoring failed (see terminal for details)")
+                    print(f"[ERROR-INFO]: Scoring failed with {msg[0]}")
+                    self.show_error_popup(f"[ERROR]: Scoring failed with {msg[0]}")
+                    return self.finish_scoring()
+
+        except Empty:
+            self.master.after(POLL_INTERVAL_MS, self.poll_scoring)
+
+    def update_progress(self):
+        rows_done, total_rows = sum(self.job_rows_done), sum(self.job_rows)
+        rows_per_sec = rows_done / max(perf_counter() - self.scoring_start, 1e-9)
+
+        self.progress_bar.configure(maximum=max(total_rows, 1), value=rows_done)
+        self.status_text.set(f"Scored {rows_done}/{total_rows} rows ({rows_per_sec:.1f} rows/sec)")
+
+    def finish_scoring(self):
+        self.scoring_thread = None
+        self.output_data_listbox.insert(tk.END, HL) # horizontal line separating output batches
+
+        self.autoscore_button.configure(state="normal")
+        self.cancel_button.configure(state="disabled")
+
+    def cancel_scoring(self):
+        if self.scoring_thread is not None:
+            self.cancel_event.set()
+            self.status_text.set("Cancelling...")
 
     def autoscore_with_data(self):
 
+        if self.scoring_thread is not None:
+            return self.show_error_popup("[ERROR]: Already scoring, wait for it to finish or cancel it first")
+
         if self.ideal_ipa_listbox.size() > 0:
             ideal_ipa_path = [*self.ideal_ipa_listbox.data_items.items()][0]
             
@@ -178,9 +234,7 @@ class AutoscorerGUI:
         self.help_window.resizable(False,True)
         self.help_window.title("Autoscorer GUI Help Menu")
 
-        help_text_fp = pkg_resources.resource_filename("spl_widgets", "data/help_text.json")
-        with open(help_text_fp, "r") as reader:
-            help_text_json = json.load(reader)
+        help_text_json = json.loads(files("spl_widgets").joinpath("data/help_text.json").read_text())
 
         self.help_app = AutoscorerHelpWindow(self.help_window, help_text_json)
 
@@ -401,6 +455,25 @@ class AutoscorerGUI:
             lambda x: self.open_file(x.widget)
         )
 
+        # scoring progress and throughput (see start_scoring())
+        status_frame = tk.Frame(output_frame)
+        status_frame.pack(side="bottom", fill="x", pady=(5,0))
+
+        self.progress_bar = ttk.Progressbar(status_frame, orient="horizontal", mode="determinate", length=150)
+        self.progress_bar.pack(side="top", fill="x")
+
+        self.status_text = tk.StringVar(value="Idle")
+        status_label = tk.Label(status_frame, textvariable=self.status_text, wraplength=180, justify="left")
+        status_label.pack(side="top", anchor="w")
+
+        self.cancel_button = tk.Button(
+            status_frame,
+            text="Cancel",
+            command=self.cancel_scoring,
+            state="disabled"
+        )
+        self.cancel_button.pack(side="top", anchor="e")
+
     def show_help(self):
         try:
             self.help_window.deiconify()
@@ -1,9 +1,45 @@
 import re
+import ast
+import json
+import tracemalloc
+from itertools import chain, product
+from typing import Iterable, Iterator
+from time import perf_counter
+from threading import local, get_ident
 from spl_widgets.util.sqlite_db import SQLiteDB
-import pkg_resources
+from spl_widgets.util.cache_util import LRUCache
+from importlib.resources import files
 
-database_fp = pkg_resources.resource_filename("spl_widgets", "data/cmudict.sqlite")
-dba = SQLiteDB(database_fp, silent=True)
+database_fp = str(files("spl_widgets").joinpath("data/cmudict.sqlite"))
+
+# the CMUdict database, connected to on first lookup (see get_dba()) rather than at import
+dba: SQLiteDB|None = None
+
+# sqlite connections may only be used by the thread that opened them, so any other thread (e.g.
+# autoscorer_gui's scoring thread) opens its own connection to the same database on its first lookup
+thread_dbas = local()
+
+def get_dba() -> SQLiteDB:
+    global dba
+    if dba is None:
+        dba = SQLiteDB(database_fp, silent=True)
+
+    if dba.thread_id == get_ident():
+        return dba
+
+    thread_dba = getattr(thread_dbas, "dba", None)
+    if thread_dba is None or thread_dba.path != dba.path:
+        thread_dba = thread_dbas.dba = SQLiteDB(dba.path, silent=True)
+
+    return thread_dba
+
+# parsed CMUdict lookups by (lowercased) word, so that repeated words cost neither a query
+# nor a parse. cached transcription lists are shared between calls and must not be mutated
+ARPABET_CACHE_SIZE = 8192
+arpabet_cache = LRUCache(ARPABET_CACHE_SIZE)
+
+# the whole of CMUdict, parsed, if loaded with preload_cmudict() (otherwise words are queried lazily)
+cmudict_preloaded: dict[str, list[list[str]]]|None = None
 
 PUNCT_RE = r"(\W*)([\w\']*)(\W*)"
 
@@ -61,31 +97,150 @@ phonemes = {
   "ZH": "ʒ"
 }
 
+# transcriptions are stored as python list reprs (e.g. "[['K', 'AE', 'T']]"), which are valid
+# JSON once their quotes are swapped. this is much faster than (and safer than) eval()
+def parse_transcriptions(transcriptions_str: str) -> list[list[str]]:
+    try:
+        return json.loads(transcriptions_str.replace("'", '"'))
+    except json.JSONDecodeError:
+        return ast.literal_eval(transcriptions_str)
+
+# ('*'*word.isalpha()) only flags all-alpha invalid words, not just floating punctuation
+# invalid all-alpha words must be flagged so they are ignored by the scorer
+def _flag_invalid(word: str) -> str:
+    return ('*'*word.isalpha()) + word
+
 def get_arpabet(word: str) -> list[list[str]]|str:
-    data = dba.execute_read_query(f'SELECT transcriptions FROM phones WHERE word = "{word}"')
-    
+    word = word.lower()
+
+    if cmudict_preloaded is not None:
+        return cmudict_preloaded.get(word) or _flag_invalid(word)
+
+    if (transcriptions := arpabet_cache.get(word)) is not None:
+        return transcriptions
+
+    data = get_dba().execute_read_query("SELECT transcriptions FROM phones WHERE word = ?", (word,))
+
     if data == []:                          # invalid word
-        # ('*'*word.isalpha()) only flags all-alpha invalid words, not just floating punctuation
-        # invalid all-alpha words must be flagged so they are ignored by the scorer
-        return ('*'*word.isalpha()) + word
-    
-    transcriptions = eval(data[0][0])
+        transcriptions = _flag_invalid(word)
+    else:
+        transcriptions = parse_transcriptions(data[0][0])
+
+    arpabet_cache.put(word, transcriptions)
     return transcriptions
 
+def get_arpabet_many(words) -> dict[str, list[list[str]]|str]:
+    """
+    Look up many words at once, as get_arpabet() does for one. Words that are not already
+    cached are fetched together in batched queries rather than one query each, and cached
+
+    Parameters
+    ----------
+        @param words ( Iterable[str] ): the words to look up (e.g. those of a sentence, or of
+        every transcription in a DataFrame). duplicates are looked up only once
+
+    Returns
+    -------
+        @returns dict[str, list[list[str]]|str]: get_arpabet()'s result for each (lowercased) word
+    """
+
+    words = dict.fromkeys(word.lower() for word in words)
+    if cmudict_preloaded is not None:
+        return {word: get_arpabet(word) for word in words}
+
+    lookups = {}
+    for word in words:
+        if (transcriptions := arpabet_cache.get(word)) is not None:
+            lookups[word] = transcriptions
+
+    to_fetch = [word for word in words if word not in lookups]
+    if to_fetch:
+        found = dict(get_dba().execute_read_query_in("phones", "word", to_fetch, fields="word, transcriptions"))
+
+        for word in to_fetch:
+            transcriptions = parse_transcriptions(found[word]) if word in found else _flag_invalid(word)
+            lookups[word] = transcriptions
+            arpabet_cache.put(word, transcriptions)
+
+    return lookups
+
+# reads and parses every CMUdict entry (see preload_cmudict())
+def _load_cmudict() -> dict[str, list[list[str]]]:
+    rows = get_dba().execute_read_query("SELECT word, transcriptions FROM phones")
+
+    phoneme_strs = {}       # share one string object per phoneme between all transcriptions
+    return {
+        word: [[phoneme_strs.setdefault(p, p) for p in tr] for tr in parse_transcriptions(transcriptions_str)]
+        for (word, transcriptions_str) in rows
+    }
+
+def preload_cmudict(report: bool = True, measure_memory: bool = False) -> dict[str, float]:
+    """
+    Loads and parses the whole of CMUdict into memory with a single query, after which
+    every get_arpabet() call is a dictionary lookup. Worthwhile for large autoscoring runs
+    (loading takes around a second); small runs are better served by the lazy, cached lookups
+
+    Parameters
+    ----------
+        @param report ( bool ): whether to print the entry count and load time (and memory used, if measured)
+        @param measure_memory ( bool ): whether to also measure the memory used, with tracemalloc. this takes
+        a second, traced load (tracing slows loading severalfold, so the timed load is never traced)
+
+    Returns
+    -------
+        @returns dict[str, float]: the number of entries loaded, the load time in seconds and
+        (if measure_memory is True) the memory used in MB
+    """
+
+    global cmudict_preloaded
+
+    start = perf_counter()
+    preloaded = _load_cmudict()
+    stats = {"entries": len(preloaded), "seconds": perf_counter() - start}
+
+    if measure_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        traced = _load_cmudict()
+        stats["megabytes"] = tracemalloc.get_traced_memory()[0] / 1e6
+        tracemalloc.stop()
+        del traced
+
+    cmudict_preloaded = preloaded
+    if report:
+        memory_str = f", {stats['megabytes']:.1f} MB" if "megabytes" in stats else ""
+        print(f"[INFO]: Preloaded {stats['entries']} CMUdict entries in {stats['seconds']:.2f}s{memory_str}")
+
+    return stats
+
+def unload_cmudict() -> None:
+    """Discard the preloaded CMUdict (see preload_cmudict()), returning to lazy lookups"""
+    global cmudict_preloaded
+    cmudict_preloaded = None
+
+def cache_info() -> dict[str, int]:
+    """Return the hit/miss statistics and size of the get_arpabet() lookup cache"""
+    return arpabet_cache.stats()
+
+def clear_cache() -> None:
+    """Empty the get_arpabet() lookup cache (and reset its statistics)"""
+    arpabet_cache.clear()
+
+# splits a space-separated word of a sentence into (leading punctuation, word, trailing punctuation)
+def split_punct(wd: str, keep_punct: bool = True) -> tuple[str, str, str]:
+    if keep_punct:
+        return re.match(PUNCT_RE, wd).groups(0)
+
+    return ("", re.sub(PUNCT_RE, r"\2", wd), "")
+
 def to_arpabet(sentence: str, keep_punct: bool = True) -> list[str]:
 
     arpa_words = []
-    
-
-    for wd in sentence.split(" "):
+    split_words = [split_punct(wd, keep_punct) for wd in sentence.split(" ")]
+    lookups = get_arpabet_many(word for (_, word, _) in split_words)     # one query per sentence
 
-        if keep_punct:
-            prepunct, word, postpunct = re.match(PUNCT_RE, wd).groups(0)
-        else:
-            prepunct = postpunct = ""
-            word = re.sub(PUNCT_RE, r"\2", wd)
+    for (prepunct, word, postpunct) in split_words:
 
-        word_arpa = get_arpabet(word.lower())
+        word_arpa = lookups[word.lower()]
 
         # sanitize valid ARPAbet words (and convert AH0 to schwa)
         if isinstance(word_arpa, list):                         # word exists in dictionary
@@ -98,36 +253,35 @@ def to_arpabet(sentence: str, keep_punct: bool = True) -> list[str]:
 
     return arpa_words[:-1]  # remove last added space to simplify the logic
 
-def to_arpabet_all(sentence: str, keep_punct: bool = True) -> list[list[str]]:
-    arpa_sentences: list[list[str]] = [[""]]
+# the possible transcriptions of each word of a sentence, formatted as they are in to_arpabet_all()
+# (i.e. with the word's punctuation, and a trailing space). words not in CMUdict have one possibility
+def get_arpabet_options(sentence: str, keep_punct: bool = True) -> list[list[list[str]]]:
+    word_options: list[list[list[str]]] = []
+    split_words = [split_punct(wd, keep_punct) for wd in sentence.split(" ")]
+    lookups = get_arpabet_many(word for (_, word, _) in split_words)     # one query per sentence
 
-    for wd in sentence.split(" "):
+    for (prepunct, word, postpunct) in split_words:
 
-        if keep_punct:
-            prepunct, word, postpunct = re.match(PUNCT_RE, wd).groups(0)
-        else:
-            prepunct = postpunct = ""
-            word = re.sub(PUNCT_RE, r"\2", wd)
+        poss_transcriptions = lookups[word.lower()]
+        if not isinstance(poss_transcriptions, list):     # not in CMU dict
+            poss_transcriptions = [[poss_transcriptions]]
 
-        poss_transcriptions = get_arpabet(word.lower())
+        word_options.append([                             # format the arpa transcription for each possible transcription
+            [ *filter(None, [prepunct, *transcription_arpa, postpunct, " "]) ]
+            for transcription_arpa in poss_transcriptions
+        ])
 
-        # sanitize valid ARPAbet words (and convert AH0 to schwa)
-        if isinstance(poss_transcriptions, list):                         # word exists in dictionary
-            poss_arpas = [                                                          # format the arpa transcription for each possible transcription
-                [ *filter(None, [prepunct, *transcription_arpa, postpunct, " "]) ]
-                for transcription_arpa in poss_transcriptions
-            ]
-            if arpa_sentences == []:
-                arpa_sentences = [arpa for arpa in poss_arpas]
-            else:
-                arpa_sentences = [s+arpa for s in arpa_sentences for arpa in poss_arpas]
-
-        else:   # not in CMU dict, add to end of each sentence 
-            poss_transcriptions = [*filter(None, [prepunct, poss_transcriptions, postpunct, " "])]
-            for s in arpa_sentences:
-                s.extend(poss_transcriptions)
-
-    return [n[:-1] for n in arpa_sentences] # remove last added space retroactively to simplify the logic
+    return word_options
+
+def to_arpabet_all(sentence: str, keep_punct: bool = True) -> list[list[str]]:
+    return [*iter_arpabet_all(sentence, keep_punct)]
+
+# the lazy equivalent of to_arpabet_all(), yielding each combination of pronunciations in turn
+# (in the same order) rather than building them all at once, of which there may be very many
+def iter_arpabet_all(sentence: str, keep_punct: bool = True) -> Iterator[list[str]]:
+    for arpas in product(*get_arpabet_options(sentence, keep_punct)):
+        arpa_sentence = ["", *chain.from_iterable(arpas)]
+        yield arpa_sentence[:-1]     # remove last added space retroactively to simplify the logic
 
 def arpa_to_ipa(arpa: list[str]):
     return [phonemes.get(tk,tk) for tk in arpa]
@@ -174,12 +328,18 @@ def _replace_ligatures(ipa_str: str) -> str:
 
     return ipa_str
 
+# matches a single IPA token, compiled once here rather than on every tokenize_ipa() call
+_ipa_tokens = sorted(phonemes.values(), key=len, reverse=True)   # prioritize finding diphthongs
+IPA_TOKEN_RE = re.compile(rf"({'|'.join(_ipa_tokens)}|\s|\*[\w\']*)")
+
 # breaks up an idealized IPA string into tokens (might not be perfect, but it's definitely
 # mostly good, and worst case we just switch to passing them as a lists of tokens)
 def tokenize_ipa(ipa_str: str) -> list[str]:
 
     ipa_str = _replace_ligatures(ipa_str)
-    tokens = sorted(phonemes.values(), key=len, reverse=True)   # prioritize finding diphthongs
-    token_re = rf"({'|'.join(tokens)}|\s|\*[\w\']*)"
+    return IPA_TOKEN_RE.findall(ipa_str)
 
-    return re.findall(token_re, ipa_str)
\ No newline at end of file
+# tokenizes many idealized IPA strings at once (see tokenize_ipa())
+def tokenize_many(ipa_strs: Iterable[str]) -> list[list[str]]:
+    findall = IPA_TOKEN_RE.findall
+    return [findall(_replace_ligatures(ipa_str)) for ipa_str in ipa_strs]
\ No newline at end of file
@@ -2,11 +2,13 @@ from argparse import ArgumentParser, RawTextHelpFormatter
 from textwrap import dedent
 from pathlib import Path
 from sys import exit
-from tkinter import filedialog
 from subprocess import run
 import re
 from spl_widgets.misc_util import get_tuning_info
-from spl_widgets.tune_freq import tune_cols
+from spl_widgets.tune_freq import tune_files, TuningParams
+from spl_widgets.util.import_util import lazy_import
+
+filedialog = lazy_import("tkinter.filedialog")
 
 # god help us all (try regex101.com if you care to puzzle this one out)
 KEY_REGEX = r"^([01][0-9]{2}-[0-9A-Fa-f]{3}(?:-[0-9A-Fa-f]{1,2})?)$"
@@ -36,13 +38,22 @@ def make_parser():
     )
 
     swx_fp_help = dedent("""\
-        Path to a .swx file to tune with keys in the passed params file.
+        Path to a .swx file (or a directory of .swx files) to tune with keys in the passed params file.
         If not provided, will prompt the user to pass the file with a file dialog.\
     """)
     parser.add_argument(
         "swx_fp", metavar="S", type=str, nargs="?",
         help=swx_fp_help
     )
+
+    jobs_help = dedent("""\
+        Number of processes to tune with, each tuning one (file, key) pair at a time.
+        Defaults to 1 (tune sequentially, parsing each file only once).\
+    """)
+    parser.add_argument(
+        "-j", "--jobs", metavar="N", type=int, default=1,
+        help=jobs_help
+    )
     
     return parser
 
@@ -61,7 +72,13 @@ def main():
             title="SWX File to tune with keys"
         )
 
-    if not Path(swx_fp).is_file():                          # bad swx filepath, bail
+    if Path(swx_fp).is_dir():                               # tune every .swx file in a directory
+        outdir = Path(swx_fp).resolve()
+        swx_fps = sorted(map(str, outdir.glob("*.swx")))
+    elif Path(swx_fp).is_file():
+        swx_fps = [str(Path(swx_fp).resolve())]
+        outdir = Path(swx_fp).resolve().parent
+    else:                                                   # bad swx filepath, bail
         raise ValueError(f"[Error] invalid filepath to .swx file: {swx_fp}")
 
     try:                                                    # get text from params file
@@ -72,27 +89,29 @@ def main():
 
     keys = re.findall(KEY_REGEX, text, re.MULTILINE)        # get keys from params file text
     print(keys)
-    successful=False    # whether the program has successfully done any tunings
-    for k in keys:      # tune with each key
-        try:                                                # get tuning params from key
+    tunings: list[TuningParams] = []
+    for k in keys:      # get tuning params from each key
+        try:
             tune_freqs, interval, scale_list, fmts_to_tune = get_tuning_info(k)
             tune_freqs = bool(tune_freqs)
-            successful = True
         except Exception:                                   # bad key, skip tune
             print(f"[Warning]: Invalid tuning key: {k}")
             continue
-        
+
         print(f"[DEBUG]: Tuning with key '{k}':")
         print(f" - {tune_freqs = } \n - {interval = } \n - {scale_list = } \n")
+        tunings.append(TuningParams(interval, scale_list, tune_freqs, fmts_to_tune))
+
+    out_dirs, errors = tune_files(swx_fps, tunings, args.jobs)    # tune each file with every key
 
-        tune_cols(swx_fp, interval, scale_list, tune_freqs, fmts_to_tune) # tune with key
+    if errors != []:                                    # each failure is already reported as it happens
+        print(f"[Warning]: {len(errors)} of {len(errors)+len(out_dirs)} tunings failed (see above)")
 
-    if not successful:                                  # no keys worked, bail
+    if out_dirs == []:                                  # no keys worked, bail
         print("[Error]: No keys successfully produced a tuned file!")
         return False
 
-    outdir = Path(swx_fp).parent                        # open output dir with tuned files
-    run(["open", outdir])
+    run(["open", outdir])                               # open output dir with tuned files
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
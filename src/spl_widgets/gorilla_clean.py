@@ -1,9 +1,11 @@
 import re                           # config and filename parsing
-import pandas as pd                 # subject file parsing
 from argparse import ArgumentParser # argparsing
 from pathlib import Path            # filesystem I/O below
 from subprocess import run
-from tkinter import filedialog
+from spl_widgets.util.import_util import lazy_import
+
+pd = lazy_import("pandas")          # subject file parsing
+filedialog = lazy_import("tkinter.filedialog")
 
 # yeah maybe it's black magic but it's so convenient
 subj_file_regex = r"(^data_exp_.+\-(\w{4})\-([0-9]+).xlsx$)"
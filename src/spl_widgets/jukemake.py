@@ -1,8 +1,10 @@
-from tkinter import filedialog
 from argparse import ArgumentParser, HelpFormatter
 from pathlib import Path
 from random import shuffle
 from subprocess import run
+from spl_widgets.util.import_util import lazy_import
+
+filedialog = lazy_import("tkinter.filedialog")
 
 # shell class to represent the values of the Namespace returned by our argparser
 # purely for transparency and convenience
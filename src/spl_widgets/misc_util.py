@@ -1,7 +1,13 @@
 from math import log, log10
 from textwrap import dedent
-import pandas as pd
+from functools import lru_cache
+from typing import NamedTuple, TextIO
+import warnings
 from io import StringIO
+from spl_widgets.util.import_util import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
 
 bad_file_str = dedent("""
     File structure of {} is malformed and cannot be read.
@@ -13,7 +19,7 @@ bad_file_str = dedent("""
 # for use in stk_swx and tune_freq
 class MalformedFileError(Exception): pass
 
-def read_df(fp: str) -> pd.DataFrame:
+def read_df(fp: str) -> "pd.DataFrame":
     try:
         df = pd.read_csv(
             StringIO(open(fp,'r').read()),
@@ -23,6 +29,61 @@ def read_df(fp: str) -> pd.DataFrame:
     except Exception:
         raise MalformedFileError(bad_file_str.format(fp))
 
+class SwxData(NamedTuple):
+    """ The contents of a .swx file: its formant count and its numeric body as a 2-D array """
+
+    formants: int
+    data: "np.ndarray"    # columns: time, then a (frequency, amplitude) pair for each formant
+
+    @property
+    def time_col(self) -> "np.ndarray":
+        return self.data[:,0]
+
+    def freq_col(self, fmt: int) -> "np.ndarray":
+        return self.data[:,2*fmt-1]
+
+    def amp_col(self, fmt: int) -> "np.ndarray":
+        return self.data[:,2*fmt]
+
+def read_swx(fp: str, dtype: type = float) -> SwxData:
+    """
+    Reads a .swx file straight into a numeric array, without the type inference and
+    DataFrame construction of read_df(). The formant count is taken from the header
+    line, and only the columns it accounts for are read (trailing empty columns are
+    ignored, as with read_df()). Files with CR, LF or CRLF line endings are accepted
+
+    Parameters
+    ----------
+    fp : str
+        Path to the .swx file
+    dtype : type
+        The dtype of the returned array (float, read as np.float64, by default; np.float32 halves memory)
+
+    Returns
+    ----------
+    SwxData
+        The formant count and data of the file
+
+    """
+
+    try:
+        with open(fp, "r", newline=None) as reader:     # universal newlines translate \r endings
+            formants = int(reader.readline().split("\t")[0])
+
+            with warnings.catch_warnings():             # an empty body is reported below instead
+                warnings.simplefilter("ignore", UserWarning)
+                data = np.loadtxt(
+                    reader, dtype=dtype, delimiter="\t",
+                    usecols=range(2*formants+1), ndmin=2
+                )
+    except Exception:
+        raise MalformedFileError(bad_file_str.format(fp))
+
+    if len(data) == 0:
+        raise MalformedFileError(bad_file_str.format(fp))
+
+    return SwxData(formants, data)
+
 # Stores notes of the chromatic scale for referencing
 notes=['A','A#','B','C','C#','D','D#','E','F','F#','G','G#']
 
@@ -68,6 +129,50 @@ def get_closest(pool: list, target: float) -> float:
 def construct_note_freqs(scale: "list[int]") -> "list[float]":
     return [to_freq((12*i)+j) for i in range(8) for j in scale if 12*i+j<=88]
 
+# Get all valid note frequencies given a scale of notes as a sorted (read-only) array, cached
+# by the scale's bitmask. to_freq is part of the cache key so that an overridden to_freq is used
+def get_note_table(scale: "list[int]") -> "np.ndarray":
+    scale_mask = sum(2**(n-1) for n in set(scale))
+    return _note_table(scale_mask, to_freq)
+
+@lru_cache(maxsize=None)
+def _note_table(scale_mask: int, note_to_freq) -> "np.ndarray":
+    scale = decode_hex_to_num_list(hex(scale_mask))
+    note_table = np.sort([note_to_freq((12*i)+j) for i in range(8) for j in scale if 12*i+j<=88])
+    note_table.flags.writeable = False
+    return note_table
+
+def snap_to_scale(freqs: "np.ndarray", note_table: "np.ndarray") -> "np.ndarray":
+    """
+    Snaps each frequency in an array to the closest note in a sorted note table
+    (as given by get_note_table()), using a binary search rather than comparing
+    against every note. The batched equivalent of get_closest()
+
+    Exact ties between two notes go to the lower note
+
+    Parameters
+    ----------
+    freqs : np.ndarray
+        The frequencies to snap
+    note_table : np.ndarray
+        The note frequencies to snap to, sorted in ascending order
+
+    Returns
+    ----------
+    np.ndarray
+        The closest note frequency to each frequency in freqs
+
+    """
+
+    if len(note_table) == 0:
+        raise ValueError("Cannot snap frequencies to an empty note table")
+
+    freqs = np.asarray(freqs, dtype=float)
+    upper = np.searchsorted(note_table, freqs).clip(1, len(note_table)-1)
+
+    below, above = note_table[upper-1], note_table[upper]
+    return np.where(freqs-below <= above-freqs, below, above)
+
 def get_tuning_info(key: str) -> tuple[int, int, list[int], list[int]]:
 
     tune_freqs = int(key[0])
@@ -87,12 +192,61 @@ def get_tuning_info(key: str) -> tuple[int, int, list[int], list[int]]:
     )
 
 # formats a pd.DataFrame to tsv (returns a string to be written to file)
+# NB: .swx output should use write_swx(), which streams rows to file instead
 def df_to_tsv(df) -> str:
     rows = ["\t".join(map(str, df.columns))]
     for i in df.index:
         rows.append("\t".join(map(str, df.iloc[i])))
     return "\n".join(rows)
 
+def write_swx(
+        out: "str | TextIO",
+        data: "np.ndarray",
+        formants: int = ...,
+        precision: int|None = None,
+        block_rows: int = 4096
+    ) -> None:
+    """
+    Writes a 2-D array of .swx data (time column, then frequency/amplitude column
+    pairs) to a file, under the usual header of the formant count followed by one
+    empty column name per data column. Rows are formatted a block at a time with
+    a single preformatted template and written straight to the file, so the whole
+    file is never held in memory as a string
+
+    Parameters
+    ----------
+    out : str | TextIO
+        Path of the file to write, or an open text file handle to write to
+    data : np.ndarray
+        The data to write, one row per time step
+    formants : int
+        The formant count for the header, by default inferred from the column count
+    precision : int | None
+        If None (the default), values are written exactly as df_to_tsv() writes
+        them (shortest round-trip repr, e.g. "260.0"), making the output
+        byte-for-byte identical to it. Otherwise, values are written with this
+        many significant digits (%g formatting), for smaller files
+    block_rows : int
+        The number of rows formatted per write
+
+    """
+
+    if isinstance(out, str):
+        with open(out, "w") as writer:
+            return write_swx(writer, data, formants, precision, block_rows)
+
+    data = np.asarray(data, dtype=float)
+    if formants is ...:
+        formants = data.shape[1]//2
+
+    value_fmt = "%r" if precision is None else f"%.{precision}g"
+    row_fmt = "\n" + "\t".join([value_fmt]*data.shape[1])
+
+    out.write(str(formants) + "\t"*(2*formants))
+    for block_start in range(0, len(data), block_rows):
+        block = data[block_start:block_start+block_rows]
+        out.write( row_fmt*len(block) % tuple(block.ravel().tolist()) )
+
 def encode_num_list_as_hex(num_list: set[int]) -> str:
     """
     Encodes a list of unique integers into a hexadecimal string in which
@@ -1,6 +1,6 @@
 from subprocess import run
-import pkg_resources
+from importlib.resources import files
 
 def main():
-    overrides_fp = pkg_resources.resource_filename("spl_widgets", "overrides/tuner_overrides.py")
+    overrides_fp = str(files("spl_widgets").joinpath("overrides/tuner_overrides.py"))
     run(["open", overrides_fp])
\ No newline at end of file
@@ -59,4 +59,30 @@ def _to_freq_amelodic(note: int) -> float:
     """
     return 26 * (2 ** ((note - 1) / 12))        # originally 27.5 * (...), see misc_util
 
-# to_freq = _to_freq_amelodic
\ No newline at end of file
+# to_freq = _to_freq_amelodic
+
+# whole columns of averaged frequencies are snapped to the scale at once by snap_to_scale(). Overriding
+# get_closest() above still works (it is then called once per frequency), but an override for the
+# batched function can be written instead
+def _snap_to_scale_below(freqs, note_table):
+    """
+    function _snap_to_scale_below()
+    ---
+    altered snap_to_scale() function which snaps each frequency to the closest note
+    at or below it (rather than the closest note overall)
+
+    Parameters:
+    ---
+    freqs: np.ndarray[float] - averaged interval frequencies to be forced
+    note_table: np.ndarray[float] - sorted array of note frequencies to pick from
+
+    Returns:
+    ---
+    freqs: np.ndarray[float] - the closest note frequency at or below each frequency
+    """
+    import numpy as np
+
+    below = np.searchsorted(note_table, freqs, side="right") - 1
+    return note_table[below.clip(0, None)]
+
+# snap_to_scale = _snap_to_scale_below
@@ -1,12 +1,14 @@
-import pandas as pd
 from io import StringIO
-from tkinter import filedialog
 from argparse import ArgumentParser
 from subprocess import run
 from pathlib import Path
-from spl_widgets.misc_util import df_to_tsv, MalformedFileError
+from spl_widgets.misc_util import write_swx, MalformedFileError
+from spl_widgets.util.import_util import lazy_import
 
-def parse_df(df: pd.DataFrame) -> "tuple[int, pd.DataFrame]":   # Returns the desired columns (active formant freq and amp) from an inputted pd.DataFrame
+pd = lazy_import("pandas")
+filedialog = lazy_import("tkinter.filedialog")
+
+def parse_df(df: "pd.DataFrame") -> "tuple[int, pd.DataFrame]":   # Returns the desired columns (active formant freq and amp) from an inputted pd.DataFrame
 
     df["f0"] = [n*10 for n in range(len(df.index))]
     for fmt in range(4,7):                                      # adds only the formants that are active (changing)
@@ -46,13 +48,9 @@ def stk_to_swx(filepath):
         col = df[colnm]
         df[colnm] = list(map(scalemult, col))
 
-    # --- Prettifying and output --- #
-    df.columns = [formants]+['']*(formants*2)
+    # --- Output --- #
     out_fp = filepath[:-4]
-
-    tsv = df_to_tsv(df)
-    with open(f"{out_fp}.swx", "w") as writer:
-        writer.write(tsv)
+    write_swx(f"{out_fp}.swx", df.to_numpy(dtype=float), formants)
 
     return f"{out_fp}.swx"
 
@@ -1,108 +1,229 @@
-import pandas as pd
-import numpy as np
 from subprocess import run
 from datetime import datetime
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Iterator, NamedTuple, TypeAlias
 # import re
 # import pkg_resources
 
+from spl_widgets import misc_util
 from spl_widgets.misc_util import *
+from spl_widgets.util.import_util import lazy_import
 # from spl_widgets.overrides.tuner_overrides import *
 
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# (frequencies, sorted note table) -> snapped frequencies
+SnapStrategy: TypeAlias = "Callable[[np.ndarray, np.ndarray], np.ndarray]"
+
+def get_snap_strategy() -> SnapStrategy:
+    """
+    Returns the function used to snap averaged interval frequencies to the scale.
+
+    By default whole columns are snapped at once with snap_to_scale(). Functions overridden
+    in overrides/tuner_overrides.py are honoured: an overriding snap_to_scale() is used in its
+    place, and an overriding get_closest() is applied to each frequency in turn
+    """
+
+    if get_closest is not misc_util.get_closest:
+        return lambda freqs, note_table: np.array(
+            [get_closest(note_table.tolist(), f) for f in freqs]
+        )
+
+    return snap_to_scale
+
+def get_slice_averages(
+        freq_col: list[float],
+        amp_col: list[float],
+        interval: int
+    ) -> "np.ndarray":
+    """ Returns the average frequency (over nonzero amplitudes) of each interval slice of a column """
+
+    amp_col = np.asarray(amp_col)
+    freq_col = np.where(amp_col>0, freq_col, 0).astype(float)
+
+    size = len(freq_col)
+    n_slices = -(-size // interval)
+    pad = n_slices*interval - size
+
+    # one row per interval slice (the last slice is zero-padded to full length)
+    freq_slices = np.pad(freq_col, (0, pad)).reshape(n_slices, interval)
+    nz_amps = np.count_nonzero(np.pad(amp_col, (0, pad)).reshape(n_slices, interval), axis=1)
+
+    # summed column by column instead of with .sum(axis=1), as numpy's pairwise summation
+    # would not match the sequential sum() of the old per-slice loop bit-for-bit
+    slice_sums = np.zeros(n_slices)
+    for col in freq_slices.T:
+        slice_sums += col
+
+    # slices with no nonzero amplitudes are left as they are (all zeros)
+    return np.divide(slice_sums, nz_amps, out=np.zeros(n_slices), where=nz_amps>0)
+
 def tune_col(
         freq_col: list[float],
         amp_col: list[float],
         interval: int,
         tune_freqs: bool,
-        scale_notes: list[float]
-    ) -> list[float]:
+        scale_notes: list[float],
+        snap: SnapStrategy = ...,
+        slice_averages: "np.ndarray" = ...
+    ) -> "np.ndarray":
 
-    freq_col = np.where(amp_col>0, freq_col, 0)
-    new_col =[]
-    
-    for slice_start in range(0, len(freq_col), interval):
+    amp_col = np.asarray(amp_col)
+    size = len(amp_col)
 
-        slice_end = slice_start + interval
-        freq_slice = freq_col[slice_start:slice_end]
+    # slice averages depend only on the column and interval, so may be passed in to be shared
+    if slice_averages is ...:
+        slice_averages = get_slice_averages(freq_col, amp_col, interval)
+    range_freqs = slice_averages.copy()
 
-        nz_amps = np.count_nonzero(amp_col[slice_start:slice_end])
-        if nz_amps == 0:
-            new_col.extend(freq_slice)
-            continue
+    to_tune = range_freqs != 0
+    if tune_freqs is True and to_tune.any():
+        if snap is ...:
+            snap = get_snap_strategy()
 
-        range_freq = sum(freq_slice) / nz_amps
+        range_freqs[to_tune] = snap(range_freqs[to_tune], np.sort(scale_notes))
 
-        if tune_freqs is True and range_freq != 0:
-            range_freq = get_closest(scale_notes, range_freq)
+    new_col = np.repeat(range_freqs, interval)[:size]
 
-        new_col+=[range_freq]*len(freq_slice)
+    # Gap-filling: a zero cell with a nonzero amplitude in its 3-cell window takes the max of
+    # its neighbours. As cells are filled left to right, a run of such cells takes the max of
+    # the value before the run (and 0), and the last cell of the run also sees the value after it
+    amp_window = np.pad(amp_col.astype(float), 1, constant_values=-np.inf)
+    amp_window = np.maximum(np.maximum(amp_window[:-2], amp_window[1:-1]), amp_window[2:])
+    to_fill = (new_col == 0) & (amp_window != 0)
 
-    for i, cell in enumerate(new_col):
-        if cell == 0:
-            if max(amp_col[max(0,i-1):i+2]) == 0:
-                continue
+    if to_fill.any():
+        idx = np.arange(size)
+        last_unfilled = np.maximum.accumulate(np.where(to_fill, -1, idx))
 
-            new_col[i] = max(new_col[max(0,i-1):i+2])
+        before = np.where(last_unfilled >= 0, new_col[last_unfilled], -np.inf)
+        after = np.append(new_col[1:], -np.inf)
+        run_end = to_fill & ~np.append(to_fill[1:], False)
+
+        fill_vals = np.maximum(before, 0)
+        fill_vals = np.where(run_end, np.maximum(fill_vals, after), fill_vals)
+        new_col = np.where(to_fill, fill_vals, new_col)
 
     return new_col
 
-def tune_cols(
-        filepath: str,
-        interval: int,
-        scale: list[int],
-        tune_freqs: bool,
-        fmts_to_tune: list[int]|None
-    ) -> str:
+class TuningParams(NamedTuple):
+    """ The parameters of a single tuning (see get_tuning_info() for decoding them from a key) """
+
+    interval: int
+    scale: list[int]
+    tune_freqs: bool
+    fmts_to_tune: list[int]|None
+
+def tune_swx(
+        swx: SwxData,
+        params: TuningParams,
+        _cache: dict = ...
+    ) -> "tuple[np.ndarray, list[int]]":
+    """
+    Tunes parsed .swx data in memory, returning the tuned data and the formants tuned
+
+    _cache (internal, see tune_cols_many()) holds results shared between tunings of the
+    same data: slice averages by (formant, interval), and tuned columns by (formant, interval,
+    tune_freqs, scale bitmask), so keys differing only in scale or formants are not recomputed
+    """
 
-    df = read_df(filepath)
+    interval, scale, tune_freqs, fmts_to_tune = params
+    formants = swx.formants
 
-    formants = len(df.columns)//2
-    out_df = pd.DataFrame(df.iloc[:,0])
+    if _cache is ...:
+        _cache = {}
 
     if fmts_to_tune == None:
         fmts_to_tune = [*range(1,formants+1)]
 
     fmts_to_tune = [*filter(lambda n: n<=formants, fmts_to_tune)]
 
-    scale_notes = construct_note_freqs(scale)
+    out_data = swx.data.copy()
+    scale_notes = get_note_table(scale)
+    scale_mask = sum(2**(n-1) for n in set(scale)) if tune_freqs is True else None
+    snap = get_snap_strategy()
+
     for fmt in range(1,formants+1):
+        if fmt not in fmts_to_tune:
+            continue
+
+        col_key = (fmt, interval, tune_freqs, scale_mask)
+        if col_key not in _cache:
+            averages_key = (fmt, interval)
+            if averages_key not in _cache:
+                _cache[averages_key] = get_slice_averages(swx.freq_col(fmt), swx.amp_col(fmt), interval)
+
+            _cache[col_key] = tune_col(
+                swx.freq_col(fmt), swx.amp_col(fmt), interval, tune_freqs,
+                scale_notes, snap, _cache[averages_key]
+            )
+
+        out_data[:,2*fmt-1] = _cache[col_key]
 
-        amp_col = df.iloc[:,2*fmt]
-        freq_col = df.iloc[:,2*fmt-1]
- 
-        if fmt in fmts_to_tune:
-            freq_col = tune_col(freq_col, amp_col, interval, tune_freqs, scale_notes)
+    return out_data, fmts_to_tune
 
-        out_df[f'F{fmt}']=freq_col
-        out_df[f'A{fmt}']=amp_col
+def get_natural_mel(swx: SwxData) -> "tuple[np.ndarray, np.ndarray]":
+    """ Returns the mask of voiced (nonzero F2 amplitude) rows and the mel values of F2 in those rows """
+
+    voiced = swx.amp_col(2) != 0
+    nat_mel = np.fromiter(map(freq_to_mel, swx.freq_col(2)[voiced]), float)
+    return voiced, nat_mel
+
+def get_tuning_key(params: TuningParams, fmts_to_tune: list[int]) -> str:
+    """ Encodes tuning parameters (with the formants actually tuned) as a tuning key """
+
+    interval, scale, tune_freqs, _ = params
+
+    notes_tuning = encode_num_list_as_hex(scale).zfill(3)
+    fmts_tuned = encode_num_list_as_hex(fmts_to_tune).zfill(2)
+
+    return f"{ int(tune_freqs) }{ str(interval).zfill(2) }-{notes_tuning}-{fmts_tuned}"
+
+def write_tuned(
+        filepath: str,
+        swx: SwxData,
+        out_data: "np.ndarray",
+        params: TuningParams,
+        fmts_to_tune: list[int],
+        natural_mel: "tuple[np.ndarray, np.ndarray]" = ...,
+        run_stamp: str = ...
+    ) -> str:
+    """
+    Writes tuned data and its params.txt to a new folder beside filepath, returning the folder path.
+
+    The folder is named tuning_done_<time written>, or, if a run_stamp is passed (for runs
+    writing many outputs at once, see tune_files()), tuning_done_<run_stamp>_<file>_<key>
+    so that the path of each output does not depend on the order in which they were written
+    """
+
+    interval, scale, tune_freqs, _ = params
+    formants = swx.formants
 
     # Mel Scale Differencing (Summer 2024)
-    difference_df = pd.DataFrame({
-        "nat_mel": map(freq_to_mel, df[3]),
-        "tuned_mel": map(freq_to_mel, out_df["F2"]),
-        "amp": df[4]
-    })
-    difference_df = difference_df[difference_df["amp"] != 0]
-    data = ( difference_df["nat_mel"] - difference_df["tuned_mel"] ).abs()
+    if natural_mel is ...:
+        natural_mel = get_natural_mel(swx)
+
+    voiced, nat_mel = natural_mel
+    tuned_mel = np.fromiter(map(freq_to_mel, out_data[voiced,3]), float)
+    data = pd.Series(nat_mel - tuned_mel).abs()
 
-    out_df.columns = [formants]+['']*(2*formants)
+    tuning_key = get_tuning_key(params, fmts_to_tune)
 
     # Makes, populates and creates a folder for tuned file
-    now_str = f'{datetime.now():%Y-%m-%d_%H.%M.%S.%f}'
     filename = filepath[filepath.rfind('/'):-4]
 
-    out_dir_filepath = filepath[:filepath.rfind('/')]+f'/tuning_done_{now_str}'
+    if run_stamp is ...:
+        out_dir_name = f'tuning_done_{datetime.now():%Y-%m-%d_%H.%M.%S.%f}'
+    else:
+        out_dir_name = f'tuning_done_{run_stamp}_{filename[1:]}_{tuning_key}'
+
+    out_dir_filepath = filepath[:filepath.rfind('/')]+f'/{out_dir_name}'
     run(['mkdir', out_dir_filepath], capture_output=True)
     
-    # convert df to tab-separated format and write to .swx file
-    tsv = df_to_tsv(out_df)
-    with open(f"{out_dir_filepath}/{filename}_tuned.swx", "w") as writer:
-        writer.write(tsv)
-
-    # Creates params.txt file
-    notes_tuning = encode_num_list_as_hex(scale).zfill(3)
-    fmts_tuned = encode_num_list_as_hex(fmts_to_tune).zfill(2)
-
-    tuning_key = f"{ int(tune_freqs) }{ str(interval).zfill(2) }-{notes_tuning}-{fmts_tuned}"
+    # write tuned data to .swx file
+    write_swx(f"{out_dir_filepath}/{filename}_tuned.swx", out_data, formants)
 
     # assign_lines = []
     # print(run(["ls"], capture_output=True))
@@ -135,4 +256,153 @@ def tune_cols(
     with open(f'{out_dir_filepath}/params.txt','w') as writer:
         writer.write('\n'.join(args))
     
-    return out_dir_filepath
\ No newline at end of file
+    return out_dir_filepath
+
+def tune_cols(
+        filepath: str,
+        interval: int,
+        scale: list[int],
+        tune_freqs: bool,
+        fmts_to_tune: list[int]|None
+    ) -> str:
+
+    params = TuningParams(interval, scale, tune_freqs, fmts_to_tune)
+    return tune_cols_many(filepath, [params])[0]
+
+def tune_cols_many(filepath: str, tunings: list[TuningParams], run_stamp: str = ...) -> list[str]:
+    """
+    Tunes a .swx file with each of a list of tunings, reading and parsing the file only once.
+    The natural mel track and the per-interval slice averages are shared between tunings
+
+    Parameters
+    ----------
+    filepath : str
+        Path to the .swx file to tune
+    tunings : list[TuningParams]
+        The parameters of each tuning to perform
+    run_stamp : str
+        If passed, names output folders by run, file and key (see write_tuned())
+
+    Returns
+    ----------
+    list[str]
+        The output folder of each tuning, in the order of tunings
+
+    """
+
+    swx = read_swx(filepath)
+    natural_mel = get_natural_mel(swx)
+    cache = {}
+
+    out_dirs = []
+    for params in tunings:
+        out_data, fmts_tuned = tune_swx(swx, params, cache)
+        out_dirs.append( write_tuned(filepath, swx, out_data, params, fmts_tuned, natural_mel, run_stamp) )
+
+    return out_dirs
+
+# top-level (so it can be pickled) tuning of one file with one set of parameters, for the process pool
+def _tune_task(filepath: str, params: TuningParams, run_stamp: str) -> str:
+    return tune_cols_many(filepath, [params], run_stamp)[0]
+
+def iter_tune_files(
+        filepaths: list[str],
+        tunings: list[TuningParams],
+        jobs: int = 1,
+        run_stamp: str = ...
+    ) -> Iterator[tuple[str, TuningParams, str|Exception]]:
+    """
+    Tunes every file with every tuning, yielding (filepath, params, output folder) for each
+    (file, tuning) pair as it completes, or (filepath, params, exception) if it failed.
+
+    With jobs > 1 the pairs are spread across a pool of that many processes and are yielded in
+    order of completion. Otherwise each file is parsed once and tuned with every tuning in turn.
+    Closing the iterator early cancels the pairs not yet started
+    """
+
+    if run_stamp is ...:
+        run_stamp = f'{datetime.now():%Y-%m-%d_%H.%M.%S.%f}'
+
+    if jobs <= 1:
+        for filepath in filepaths:
+            try:
+                swx = read_swx(filepath)
+                natural_mel = get_natural_mel(swx)
+            except Exception as e:
+                for params in tunings:
+                    yield (filepath, params, e)
+                continue
+
+            cache = {}
+            for params in tunings:
+                try:
+                    out_data, fmts_tuned = tune_swx(swx, params, cache)
+                    result = write_tuned(filepath, swx, out_data, params, fmts_tuned, natural_mel, run_stamp)
+                except Exception as e:
+                    result = e
+                yield (filepath, params, result)
+        return
+
+    pool = ProcessPoolExecutor(jobs)
+    try:
+        futures = {
+            pool.submit(_tune_task, filepath, params, run_stamp): (filepath, params)
+            for filepath in filepaths for params in tunings
+        }
+        for future in as_completed(futures):
+            (filepath, params) = futures[future]
+            yield (filepath, params, future.exception() or future.result())
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+def tune_files(
+        filepaths: list[str],
+        tunings: list[TuningParams],
+        jobs: int = 1,
+        on_progress: "Callable[[int, int, str, TuningParams, str|Exception], None]" = ...
+    ) -> tuple[list[str], list[tuple[str, TuningParams, Exception]]]:
+    """
+    Tunes every file with every tuning (optionally across a process pool, see iter_tune_files()),
+    reporting progress as each (file, tuning) pair completes.
+
+    Parameters
+    ----------
+    filepaths : list[str]
+        Paths to the .swx files to tune
+    tunings : list[TuningParams]
+        The parameters of each tuning to perform on each file
+    jobs : int
+        The number of processes to tune with (1 tunes in this process)
+    on_progress : Callable
+        Called with (number done, total, filepath, params, result) after each pair completes.
+        By default, prints a line for each
+
+    Returns
+    ----------
+    tuple[list[str], list[tuple[str, TuningParams, Exception]]]
+        The output folders of the successful tunings (sorted), and the (filepath, params, error)
+        of each failed one
+
+    """
+
+    if on_progress is ...:
+        on_progress = print_tuning_progress
+
+    total = len(filepaths) * len(tunings)
+    out_dirs, errors = [], []
+
+    for done, (filepath, params, result) in enumerate(iter_tune_files(filepaths, tunings, jobs), start=1):
+        if isinstance(result, Exception):
+            errors.append((filepath, params, result))
+        else:
+            out_dirs.append(result)
+
+        on_progress(done, total, filepath, params, result)
+
+    return sorted(out_dirs), errors
+
+def print_tuning_progress(done: int, total: int, filepath: str, params: TuningParams, result: str|Exception):
+    if isinstance(result, Exception):
+        print(f"[{done}/{total}] [Error]: tuning {Path(filepath).name} with {params} failed: {result!r}")
+    else:
+        print(f"[{done}/{total}] {Path(filepath).name} -> {Path(result).name}")
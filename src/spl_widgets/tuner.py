@@ -1,10 +1,52 @@
 import tkinter as tk
 from tkinter import filedialog, ttk
 from spl_widgets.misc_util import *
-from spl_widgets.tune_freq import tune_cols
+from spl_widgets.tune_freq import iter_tune_files, print_tuning_progress, TuningParams
 from spl_widgets.util.gui_util import RadioFrame
 from subprocess import run
 from pathlib import Path
+from os import cpu_count
+from threading import Thread, Event
+from queue import Queue, Empty
+from collections import deque
+from time import perf_counter
+from typing import NamedTuple
+
+# how often (in ms) the GUI checks the tuning thread's queue for progress
+POLL_INTERVAL_MS = 100
+
+class TuningJob(NamedTuple):
+    """ One press of "Tune File": the files to tune with one set of parameters, and what to open when done """
+
+    name: str
+    filepaths: list[str]
+    params: TuningParams
+    jobs: int
+    open_path: str|None     # None opens the output folder of the (single) tuned file
+
+# runs on a worker thread, so must not touch any widgets. puts ("progress", done, total, filepath, result)
+# on the queue as each file is tuned, then ("done", out_dirs), ("cancelled", out_dirs) or ("error", message)
+# at the end (always one of them, so that the GUI moves on to the next job whatever happens)
+def run_tuning_job(job: TuningJob, messages: Queue, cancel_event: Event):
+    out_dirs = []
+
+    try:
+        tuned = iter_tune_files(job.filepaths, [job.params], job.jobs)
+        try:
+            for (done, (filepath, _, result)) in enumerate(tuned, start=1):
+                if not isinstance(result, Exception):
+                    out_dirs.append(result)
+                messages.put(("progress", done, len(job.filepaths), filepath, result))
+
+                if cancel_event.is_set():
+                    return messages.put(("cancelled", out_dirs))
+        finally:
+            tuned.close()           # cancels the files not yet started
+
+    except Exception as e:
+        return messages.put(("error", repr(e)))
+
+    messages.put(("done", out_dirs))
 
 class TunerApp(tk.Tk):
 
@@ -167,35 +209,101 @@ class TunerApp(tk.Tk):
 
         can_proceed = (filepath and interval and (scale or not tune_freqs))
         if can_proceed:
+            params = TuningParams(interval, scale, bool(tune_freqs), self.fmts_to_tune)
 
             if self.file_type_var.get() == 0:   # 1: dir, 0: file
-                outfilepath = tune_cols(
-                    filepath,
-                    interval,
-                    scale,
-                    bool(tune_freqs),
-                    self.fmts_to_tune
-                )
-                run(['open', outfilepath], capture_output=True)
-
+                job = TuningJob(Path(filepath).name, [filepath], params, 1, None)
             else:
-                files_in_dir = Path(filepath).glob("*.swx")
-                for file in files_in_dir:
-                    tune_cols(
-                        str(file),
-                        interval,
-                        scale,
-                        bool(tune_freqs),
-                        self.fmts_to_tune
-                    )
-                run(['open', filepath], capture_output=True)
+                # tune the files in parallel, one process per core
+                files_in_dir = sorted(map(str, Path(filepath).glob("*.swx")))
+                job = TuningJob(Path(filepath).name, files_in_dir, params, cpu_count() or 1, filepath)
+
+            # jobs are queued and run one at a time in the background, so the window stays responsive
+            self.tuning_jobs.append(job)
+            if self.tuning_thread is None:
+                self.start_next_job()
+            else:
+                self.update_status()
+
+    def start_next_job(self):
+        if not self.tuning_jobs:
+            self.tuning_thread = None
+            self.current_job = None
+            self.cancel_button.configure(state="disabled")
+            return
+
+        self.current_job = self.tuning_jobs.popleft()
+        self.job_start = perf_counter()
+        self.job_done = 0
+        self.progress_bar.configure(maximum=max(len(self.current_job.filepaths), 1), value=0)
+        self.cancel_button.configure(state="normal")
+        self.update_status()
+
+        self.cancel_event.clear()
+        self.tuning_thread = Thread(
+            target=run_tuning_job, args=(self.current_job, self.tuning_queue, self.cancel_event), daemon=True
+        )
+        self.tuning_thread.start()
+        self.after(POLL_INTERVAL_MS, self.poll_tuning)
+
+    def poll_tuning(self):
+        try:
+            while True:
+                (kind, *msg) = self.tuning_queue.get_nowait()
+
+                if kind == "progress":
+                    (self.job_done, total, filepath, result) = msg
+                    print_tuning_progress(self.job_done, total, filepath, self.current_job.params, result)
+                    self.progress_bar.configure(value=self.job_done)
+                    self.update_status()
+                    continue
+
+                # the job's outcome stays on the status bar unless another job is queued
+                (name, total) = (self.current_job.name, len(self.current_job.filepaths))
+                if kind == "error":
+                    print(f"[ERROR-INFO]: Tuning {name} failed with {msg[0]}")
+                    self.status_var.set(f"[ERROR]: Tuning {name} failed (see terminal for details)")
+                    return self.start_next_job()
+
+                (out_dirs,) = msg
+                if kind == "done":
+                    elapsed = perf_counter() - self.job_start
+                    self.status_var.set(f"Done: tuned {len(out_dirs)}/{total} files of {name} in {elapsed:.1f}s")
+                    if out_dirs:
+                        run(['open', self.current_job.open_path or out_dirs[0]], capture_output=True)
+                if kind == "cancelled":
+                    print(f"[INFO]: Cancelled tuning {name} after {self.job_done} file(s)")
+                    self.status_var.set(f"Cancelled {name} after {self.job_done}/{total} files")
+
+                return self.start_next_job()
+
+        except Empty:
+            self.after(POLL_INTERVAL_MS, self.poll_tuning)
+
+    def update_status(self):
+        (done, total) = (self.job_done, len(self.current_job.filepaths))
+        elapsed = perf_counter() - self.job_start
+
+        status = f"Tuning {self.current_job.name}: {done}/{total} files"
+        if 0 < done < total:
+            status += f", ETA {elapsed/done * (total-done):.0f}s"
+        if self.tuning_jobs:
+            status += f" ({len(self.tuning_jobs)} queued)"
+
+        self.status_var.set(status)
+
+    def cancel_tuning(self):
+        # cancels the current job (once its running files finish) and every queued job
+        self.tuning_jobs.clear()
+        self.cancel_event.set()
+        self.status_var.set(f"Cancelling {self.current_job.name}...")
 
     def __init__(self):
         super().__init__()
 
         # Window config
         self.title("CTSF's SWX Tuner")
-        self.geometry("460x330+50+50")
+        self.geometry("460x365+50+50")
         self.resizable(False, False)
         self.config(padx=4, pady=5, background="darkgray")
 
@@ -212,6 +320,15 @@ class TunerApp(tk.Tk):
         self.show_scales_var = tk.IntVar()
         self.note_vars = [tk.IntVar() for _ in range(len(notes))]
         self.tune_freqs_var = tk.IntVar(value=1)
+        self.status_var = tk.StringVar(value="Idle")
+
+        # CONFIG: background tuning (see tune_with_data())
+
+        self.tuning_jobs: deque[TuningJob] = deque()
+        self.tuning_thread: Thread|None = None
+        self.tuning_queue = Queue()
+        self.cancel_event = Event()
+        self.current_job: TuningJob|None = None
 
 
         # Top-level Frames for left and right sides
@@ -228,6 +345,26 @@ class TunerApp(tk.Tk):
             highlightthickness=1
         )
 
+        # Frame for tuning progress (packed first, so that it spans the bottom of the window)
+        status_frame = tk.Frame(self,
+            highlightbackground="black",
+            highlightthickness=1
+        )
+        status_frame.pack(side='bottom', fill="x", padx=1, pady=(2,0))
+
+        self.progress_bar = ttk.Progressbar(status_frame, orient="horizontal", mode="determinate", length=200)
+        self.progress_bar.pack(side='left', padx=2, pady=2)
+
+        self.cancel_button = tk.Button(
+            status_frame, text="Cancel",
+            command=self.cancel_tuning,
+            state="disabled"
+        )
+        self.cancel_button.pack(side='right', padx=2)
+
+        status_label = tk.Label(status_frame, textvariable=self.status_var, anchor="w")
+        status_label.pack(side='left', fill="x", expand=True)
+
         # Packing frames in this order so the options frame expands correctly
         tuning_frame.pack(
             side='right', anchor="n", fill="both",
@@ -0,0 +1,109 @@
+from collections import OrderedDict
+from hashlib import sha256
+from pathlib import Path
+from typing import Any, Hashable, Iterable
+import json
+
+from spl_widgets.util.sqlite_db import SQLiteDB
+
+class LRUCache:
+    """
+    A bounded mapping which evicts its least recently used entry once it is full,
+    and keeps count of lookups that hit and missed
+    """
+
+    maxsize: int
+    hits: int
+    misses: int
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.hits = self.misses = 0
+        self._data: OrderedDict = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the value cached for key (marking it most recently used), or default if absent"""
+        if key not in self._data:
+            self.misses += 1
+            return default
+
+        self.hits += 1
+        self._data.move_to_end(key)
+        return self._data[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Cache a value for key, evicting the least recently used entry if over capacity"""
+        self._data[key] = value
+        self._data.move_to_end(key)
+
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        """Empty the cache and reset its statistics"""
+        self._data.clear()
+        self.hits = self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        """Return the cache's hit/miss counts, current size and capacity"""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._data), "maxsize": self.maxsize}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+class PersistentCache:
+    """
+    An on-disk mapping (in an SQLite database) from keys built of JSON-serializable parts to
+    JSON-serializable values, which persists between runs. Keys are stored as hashes of their
+    parts (see make_key()), and the cache keeps count of lookups that hit and missed
+    """
+
+    path: str
+    hits: int
+    misses: int
+
+    def __init__(self, path: "str | Path"):
+        self.path = str(path)
+        self.hits = self.misses = 0
+
+        self.db = SQLiteDB(self.path, silent=True)
+        self.db.execute_query("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT)")
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Return the key for a sequence of JSON-serializable parts (a hash of their JSON)"""
+        return sha256(json.dumps(parts, ensure_ascii=False).encode()).hexdigest()
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, Any]:
+        """Return the cached values of those keys which are cached (looked up in batches)"""
+        keys = [*keys]
+        found = {
+            key: json.loads(value)
+            for (key, value) in self.db.execute_read_query_in("cache", "key", keys, fields="key, value")
+        }
+
+        self.hits += sum(key in found for key in keys)
+        self.misses += sum(key not in found for key in keys)
+        return found
+
+    def contains_many(self, keys: Iterable[str]) -> set[str]:
+        """Return those keys which are cached, without loading their values or counting lookups"""
+        return {key for (key,) in self.db.execute_read_query_in("cache", "key", keys, fields="key")}
+
+    def put_many(self, items: Iterable[tuple[str, Any]]) -> None:
+        """Cache (or replace) a value for each key, in a single transaction"""
+        self.db.executemany_query(
+            "INSERT OR REPLACE INTO cache VALUES (?, ?)",
+            [(key, json.dumps(value, ensure_ascii=False)) for (key, value) in items]
+        )
+
+    def stats(self) -> dict[str, int]:
+        """Return the cache's hit/miss counts and size"""
+        size = self.db.execute_read_query("SELECT COUNT(*) FROM cache")[0][0]
+        return {"hits": self.hits, "misses": self.misses, "size": size}
+
+    def close(self) -> None:
+        self.db.connection.close()
@@ -1,6 +1,7 @@
 from openpyxl.cell.rich_text import TextBlock, CellRichText
 from openpyxl.cell.text import InlineFont
 import re
+from typing import TypeAlias, Iterable
 
 # This regex is largely simplified now & does not use exact ANSI escape codes
 # because there is literally no reason to, these will never be printed to terminal 
@@ -37,3 +38,32 @@ def to_rich_text(in_text) -> CellRichText:
 
     return text
 
+# text as (color, text) runs, where color is a key of font_colors or "" for unstyled text.
+# this is the structured equivalent of the \R/\G/\Y/\C markup, which needs no parsing
+RichTextSegments: TypeAlias = list[tuple[str, str]]
+
+# appends a run to a list of segments, merging it into the last run if that has the same color
+def append_segment(segments: RichTextSegments, color: str, text: str) -> None:
+    if not text:
+        return
+
+    if segments and segments[-1][0] == color:
+        segments[-1] = (color, segments[-1][1] + text)
+    else:
+        segments.append((color, text))
+
+def segments_to_rich_text(segments: Iterable[tuple[str, str]]) -> CellRichText:
+    """
+    Converts (color, text) segments to rich text, with one TextBlock per run of a color
+    (adjacent segments of the same color are merged). Equivalent to to_rich_text() on the
+    corresponding markup, without building or parsing it
+    """
+
+    coalesced: RichTextSegments = []
+    for (color, chars) in segments:
+        append_segment(coalesced, color, chars)
+
+    return CellRichText([
+        TextBlock(font_colors[color], chars) if color else chars
+        for (color, chars) in coalesced
+    ])
@@ -0,0 +1,29 @@
+from importlib import import_module
+from typing import Any
+import sys
+
+# pandas, numpy and tkinter each take a noticeable time to import, and the console scripts only need them
+# once their arguments are parsed (not for --help, bad arguments or key validation). modules using them bind
+# them at the top with lazy_import() instead, e.g. `np = lazy_import("numpy")`, and use them as usual.
+# NB: a lazy module is imported as soon as any attribute of it is used, including in default argument values
+# and annotations evaluated at import (quote the latter, e.g. "np.ndarray")
+
+class LazyModule:
+    """
+    Stands in for a module, which is imported the first time one of its attributes is used
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+
+    def __getattr__(self, attr: str) -> Any:
+        module = sys.modules.get(self._name) or import_module(self._name)
+        return getattr(module, attr)
+
+    def __repr__(self) -> str:
+        loaded = "loaded" if self._name in sys.modules else "not yet loaded"
+        return f"<lazy module '{self._name}' ({loaded})>"
+
+def lazy_import(name: str) -> LazyModule:
+    """Return a stand-in for the named module (e.g. "pandas", "tkinter.filedialog"), imported on first use"""
+    return LazyModule(name)
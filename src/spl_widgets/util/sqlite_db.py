@@ -1,4 +1,5 @@
 import sqlite3
+from threading import get_ident
 from sqlite3 import Error, Connection
 
 # wrapper for convenience (ugly but functional)
@@ -18,11 +19,13 @@ def errorhandle_sqlite(warn: bool = False):
 class SQLiteDB:
     path: str
     connection: Connection
+    thread_id: int                                  # the thread that opened the connection (the only one that may use it)
     tables: "dict[str, SQLiteTable]"
 
     @errorhandle_sqlite(warn=True)
     def __init__(self, path: str, silent: bool = False):
         self.path = path
+        self.thread_id = get_ident()
         self.connection = sqlite3.connect(path)
         if not silent:
             print("Connection Successful!")
@@ -53,14 +56,46 @@ class SQLiteDB:
         cursor.close()
 
     @errorhandle_sqlite(warn=True)
-    def execute_read_query(self, query: str) -> list|None:
+    def execute_read_query(self, query: str, params: tuple|dict = ()) -> list|None:
         cursor = self.connection.cursor()
 
-        cursor.execute(query)
+        cursor.execute(query, params)
         vals = cursor.fetchall()
 
         cursor.close()
         return vals
+
+    # sqlite caps the number of bound parameters per statement (999 before 3.32)
+    MAX_QUERY_PARAMS = 999
+
+    def execute_read_query_in(
+            self, table: str, column: str, values, fields: str = "*",
+            chunk_size: int = ...
+        ) -> list:
+        """
+        Return the rows of a table whose column takes any of the given values, using
+        parameterized `WHERE column IN (...)` queries of up to chunk_size values each,
+        so that a batch of lookups costs one round-trip per chunk rather than one per value.
+        Unlike execute_read_query(), errors are raised rather than warned about, as an empty
+        result would be indistinguishable from a failed query
+        """
+
+        if chunk_size is ...:
+            chunk_size = self.MAX_QUERY_PARAMS
+
+        values = list(dict.fromkeys(values))        # deduplicate, keeping order
+        rows = []
+
+        for chunk_start in range(0, len(values), chunk_size):
+            chunk = values[chunk_start:chunk_start+chunk_size]
+            placeholders = ",".join("?"*len(chunk))
+            cursor = self.connection.execute(
+                f"SELECT {fields} FROM {table} WHERE {column} IN ({placeholders})", tuple(chunk)
+            )
+            rows.extend(cursor.fetchall())
+            cursor.close()
+
+        return rows
     
     def add_table(self, name: str, fields: list[str], exclude_id: bool = False, **kwargs):
         if (name.lower() in self.query_tables()):
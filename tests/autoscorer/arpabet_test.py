@@ -0,0 +1,124 @@
+import sqlite3
+import tracemalloc
+import pytest
+from threading import Thread
+
+from spl_widgets.autoscorer import tokenize_to_ipa
+from spl_widgets.util.sqlite_db import SQLiteDB
+from spl_widgets.autoscorer.tokenize_to_ipa import (
+    get_arpabet, get_arpabet_many, to_arpabet, to_arpabet_all, iter_arpabet_all, cache_info, clear_cache
+)
+
+def test_get_arpabet_lookups(cmudict):
+    assert get_arpabet("read") == [['R', 'EH', 'D'], ['R', 'IY', 'D']]
+    assert get_arpabet("xyzzy") == "*xyzzy"         # all-alpha words missing from the dictionary are flagged
+    assert get_arpabet("--") == "--"
+
+def test_get_arpabet_cache(cmudict, monkeypatch):
+    to_arpabet("The cat sat on the mat, the end")       # each unique word is looked up once
+    to_arpabet("the cat")
+    stats = cache_info()
+    assert (stats["hits"], stats["misses"]) == (2, 6)
+
+    # cached words are not looked up again, including those missing from the dictionary
+    monkeypatch.setattr(tokenize_to_ipa, "dba", None)
+    assert get_arpabet("THE") == [['DH', 'AX'], ['DH', 'AH'], ['DH', 'IY']]
+    assert get_arpabet("end") == "*end"
+
+    clear_cache()
+    assert cache_info() == {"hits": 0, "misses": 0, "size": 0, "maxsize": tokenize_to_ipa.ARPABET_CACHE_SIZE}
+
+def test_get_arpabet_cache_bounded(cmudict, monkeypatch):
+    monkeypatch.setattr(tokenize_to_ipa.arpabet_cache, "maxsize", 2)
+    for word in ["cat", "sat", "mat", "cat"]:
+        get_arpabet(word)
+
+    assert cache_info()["size"] == 2 and cache_info()["misses"] == 4
+
+def test_preload_cmudict(cmudict, monkeypatch):
+    lazy = {word: get_arpabet(word) for word in ["the", "don't", "read", "xyzzy", "--"]}
+
+    # the timed load is not traced, memory being measured with a second, traced load
+    tracing = []
+    load_cmudict = tokenize_to_ipa._load_cmudict
+    monkeypatch.setattr(tokenize_to_ipa, "_load_cmudict", lambda: tracing.append(tracemalloc.is_tracing()) or load_cmudict())
+
+    stats = tokenize_to_ipa.preload_cmudict(report=True, measure_memory=True)
+    try:
+        assert stats["entries"] == 29 and stats["megabytes"] > 0 and tracing == [False, True]
+        assert "megabytes" not in tokenize_to_ipa.preload_cmudict(report=False)
+
+        monkeypatch.setattr(tokenize_to_ipa, "dba", None)           # no queries are made once preloaded
+        assert {word: get_arpabet(word) for word in lazy} == lazy
+    finally:
+        tokenize_to_ipa.unload_cmudict()
+
+def test_get_arpabet_many(cmudict, monkeypatch):
+    words = ["Read", "xyzzy", "--", "read", "word", "don't", ""]
+    expected = {word.lower(): get_arpabet(word) for word in words}
+    clear_cache()
+
+    queries = []
+    tokenize_to_ipa.dba.connection.set_trace_callback(queries.append)
+
+    assert get_arpabet_many(words) == expected
+    assert len(queries) == 1 and get_arpabet("word") == "*word"     # column names are not interpolated into queries
+
+    # lookups are cached, and chunked to the parameter limit
+    monkeypatch.setattr(tokenize_to_ipa.dba, "MAX_QUERY_PARAMS", 2)
+    assert get_arpabet_many(["read", "cat", "dog", "sat", "xyzzy"])["xyzzy"] == "*xyzzy"
+    assert len(queries) == 3 and cache_info()["size"] == 9
+
+def test_get_arpabet_many_errors(cmudict, tmp_path, monkeypatch):
+    # a failed query must not be mistaken for words missing from the dictionary (and cached as such)
+    monkeypatch.setattr(tokenize_to_ipa, "dba", SQLiteDB(str(tmp_path / "empty.sqlite"), silent=True))
+    with pytest.raises(sqlite3.OperationalError):
+        get_arpabet_many(["cat", "sat"])
+
+    assert cache_info()["size"] == 0
+
+def test_get_arpabet_threads(cmudict):
+    expected = get_arpabet_many(["cat", "sat", "xyzzy"])
+
+    # each thread looks words up through its own connection (sqlite connections can't be shared)
+    for _ in range(2):
+        clear_cache()
+        looked_up = []
+        thread = Thread(target=lambda: looked_up.append(get_arpabet_many(["cat", "sat", "xyzzy"])))
+        thread.start()
+        thread.join()
+
+        assert looked_up == [expected]
+
+def test_to_arpabet_one_query_per_sentence(cmudict, monkeypatch):
+    sentence = "She sells sea shells, by the sea shore!"
+    single = (to_arpabet(sentence), to_arpabet_all(sentence), to_arpabet(sentence, keep_punct=False))
+    clear_cache()
+
+    queries = []
+    tokenize_to_ipa.dba.connection.set_trace_callback(queries.append)
+
+    assert (to_arpabet(sentence), to_arpabet_all(sentence), to_arpabet(sentence, keep_punct=False)) == single
+    assert len(queries) == 1
+
+def test_iter_arpabet_all(cmudict):
+    sentence = "Read the book, to the boy!"
+
+    # the eager construction iter_arpabet_all() replaced
+    expected = [[""]]
+    for wd in sentence.split(" "):
+        prepunct, word, postpunct = tokenize_to_ipa.split_punct(wd)
+        expected = [
+            s + [*filter(None, [prepunct, *arpa, postpunct, " "])]
+            for s in expected for arpa in get_arpabet(word)
+        ]
+
+    assert [*iter_arpabet_all(sentence)] == to_arpabet_all(sentence) == [n[:-1] for n in expected]
+
+    # variants are produced one at a time
+    variants = iter_arpabet_all("the " * 40)        # 3**40 pronunciations
+    assert next(variants) == ["", *["DH", "AX", " "]*40]
+
+def test_tokenize_ipa():
+    assert tokenize_to_ipa.tokenize_ipa("ðə ʧɑil *xyz") == ["ð", "ə", " ", "tʃ", "ɑi", "l", " ", "*xyz"]
+    assert tokenize_to_ipa.tokenize_many(["ðə", "", "ʤʌmp"]) == [["ð", "ə"], [], ["dʒ", "ʌ", "m", "p"]]
@@ -0,0 +1,210 @@
+import numpy as np
+import pandas as pd
+import pytest
+from openpyxl import Workbook, load_workbook
+
+from spl_widgets.util.cache_util import PersistentCache
+from spl_widgets.autoscorer import autoscore, tokenize_to_ipa
+from spl_widgets.autoscorer.autoscore import (
+    get_sentence_ipas, score_inputs, score_subjects, process_inputs,
+    segment_score_matrix, segment_stats, write_per_segment
+)
+
+TARGETS = ["The cat sat on the mat", "She sells sea shells", "The boy ran to the store"]
+SUBJECTS = {
+    "S1": ["The cat sat on the mat", "She sells shells", "The boy ran"],
+    "S2": ["A cat sat on a mat", "Sea shells", "The dog ran to the store!"],
+    "S3": ["", "she sells sea shells by the sea shore", "boy boy boy"],
+}
+
+def test_score_subjects_parallel(cmudict):
+    sentence_ipas = get_sentence_ipas(TARGETS)
+
+    for scoring_mode in ["preferred-transcription", "best-match"]:
+        expected = {
+            subject: score_inputs(TARGETS, sentence_ipas, transcriptions, scoring_mode)
+            for (subject, transcriptions) in SUBJECTS.items()
+        }
+
+        assert score_subjects(TARGETS, sentence_ipas, SUBJECTS, scoring_mode) == expected
+        assert score_subjects(TARGETS, sentence_ipas, SUBJECTS, scoring_mode, jobs=2) == expected
+
+def test_process_inputs(cmudict):
+    ws = Workbook().active
+    phoneme_scores, sentence_ipas = process_inputs([*zip(TARGETS, SUBJECTS["S1"])], ws, "preferred-transcription")
+
+    assert sentence_ipas == get_sentence_ipas(TARGETS)
+    assert phoneme_scores["The cat sat on the mat"] == [1]*15
+    assert [ws[f"F{row}"].value for row in range(2, 6)] == ["15/15", "10/12", "7/15", "Total Score: 32/42"]
+    assert str(ws["E3"].value) == "ʃi sɛlz(si) ʃɛlz"
+
+def test_process_inputs_shared_ipa(cmudict, monkeypatch):
+    sentence_ipas = get_sentence_ipas(TARGETS)
+    expected = process_inputs([*zip(TARGETS, SUBJECTS["S2"])], Workbook().active, "best-match")
+
+    # the target IPA passed in is not recomputed
+    monkeypatch.setattr(autoscore, "str_to_ipa", None)
+    inputs = [*zip(TARGETS, SUBJECTS["S2"])]
+    assert process_inputs(inputs, Workbook().active, "best-match", sentence_ipas=sentence_ipas) == expected
+
+def test_score_subjects_result_cache(cmudict, tmp_path, monkeypatch):
+    sentence_ipas = get_sentence_ipas(TARGETS)
+    expected = score_subjects(TARGETS, sentence_ipas, SUBJECTS, "best-match")
+
+    cache = PersistentCache(tmp_path / "results.sqlite")
+    assert score_subjects(TARGETS, sentence_ipas, SUBJECTS, "best-match", result_cache=cache) == expected
+    assert cache.stats() == {"hits": 0, "misses": 9, "size": 9}
+
+    # only new or changed rows are scored again
+    scored = []
+    score_inputs = autoscore.score_inputs
+    monkeypatch.setattr(autoscore, "score_inputs", lambda *args: scored.extend(args[2]) or score_inputs(*args))
+
+    subjects = SUBJECTS | {"S3": ["", "She sells sea shells", "boy boy boy"], "S4": SUBJECTS["S1"]}
+    rescored = score_subjects(TARGETS, sentence_ipas, subjects, "best-match", jobs=2, result_cache=cache)
+
+    assert rescored == expected | {"S3": rescored["S3"], "S4": expected["S1"]}
+    assert rescored["S3"][1].score == 12 and scored == ["She sells sea shells"]
+    assert cache.stats() == {"hits": 8, "misses": 9+1, "size": 10}
+
+    # results are cached per scoring mode
+    score_subjects(TARGETS, sentence_ipas, SUBJECTS, "preferred-transcription", result_cache=cache)
+    assert cache.stats()["size"] == 19
+
+def test_score_subjects_dedup(cmudict, monkeypatch):
+    sentence_ipas = get_sentence_ipas(TARGETS)
+    subjects = SUBJECTS | {"S4": [n.upper() for n in SUBJECTS["S1"]], "S5": SUBJECTS["S2"]}
+
+    scored = []
+    score_inputs = autoscore.score_inputs
+    monkeypatch.setattr(autoscore, "score_inputs", lambda *args: scored.extend(args[2]) or score_inputs(*args))
+
+    stats = {}
+    scored_subjects = dict(autoscore.iter_score_subjects(TARGETS, sentence_ipas, subjects, "best-match", stats=stats))
+    assert stats == {"rows": 15, "unique": 9, "cached": 0} and len(scored) == 9
+
+    # rows are as if every transcription were scored separately, with their own text
+    for (subject, transcriptions) in subjects.items():
+        assert scored_subjects[subject] == score_inputs(TARGETS, sentence_ipas, transcriptions, "best-match")
+
+def test_score_subjects_streamed(cmudict, tmp_path, monkeypatch):
+    monkeypatch.setattr(autoscore, "PROGRESS_CHUNK_SIZE", 2)
+    sentence_ipas = get_sentence_ipas(TARGETS)
+    expected = score_subjects(TARGETS, sentence_ipas, SUBJECTS, "best-match")
+
+    scored = []
+    score_inputs = autoscore.score_inputs
+    monkeypatch.setattr(autoscore, "score_inputs", lambda *args: scored.extend(args[2]) or score_inputs(*args))
+
+    # each subject is yielded once the chunk holding its last new pair is scored, before later subjects' pairs
+    cache = PersistentCache(tmp_path / "results.sqlite")
+    scored_subjects = autoscore.iter_score_subjects(TARGETS, sentence_ipas, SUBJECTS, "best-match", result_cache=cache)
+    assert next(scored_subjects) == ("S1", expected["S1"]) and len(scored) == 4
+    assert dict(scored_subjects) == {"S2": expected["S2"], "S3": expected["S3"]} and len(scored) == 9
+
+    # and likewise with rows from the result cache
+    scored.clear()
+    scored_subjects = autoscore.iter_score_subjects(TARGETS, sentence_ipas, SUBJECTS, "best-match", result_cache=cache)
+    assert next(scored_subjects) == ("S1", expected["S1"]) and cache.stats()["hits"] == 4
+    assert dict(scored_subjects) == {"S2": expected["S2"], "S3": expected["S3"]} and scored == []
+
+def test_main_preload(cmudict, tmp_path, monkeypatch):
+    df = pd.DataFrame({"Target": TARGETS, **SUBJECTS})
+    expected = autoscore.main(df.copy(), tmp_path, "lazy")
+
+    try:
+        preloaded = autoscore.main(df.copy(), tmp_path, "preloaded", jobs=2, preload=True)
+        assert tokenize_to_ipa.cmudict_preloaded is not None
+
+        sheets = [[[[cell.value for cell in row] for row in ws.iter_rows()] for ws in load_workbook(fp)] for fp in (expected, preloaded)]
+        assert sheets[0] == sheets[1]
+
+        # worker processes preload too if the parent did (spawned workers don't inherit it)
+        monkeypatch.setattr(tokenize_to_ipa, "cmudict_preloaded", None)
+        autoscore._init_scoring_worker(str(cmudict), preload=True)
+        assert tokenize_to_ipa.cmudict_preloaded is not None
+    finally:
+        tokenize_to_ipa.unload_cmudict()
+
+def test_score_subjects_beam_width(cmudict, tmp_path):
+    sentences = ["the wind will tear the trees to the shore"]
+    (sentence_ipas, subjects) = (get_sentence_ipas(sentences), {"S1": ["the wind to tear a lead to the read live bass"]})
+
+    beam = autoscore.ScoringOptions(beam_width=1)
+    expected = {
+        options: score_inputs(sentences, sentence_ipas, subjects["S1"], "best-match", options)
+        for options in (autoscore.ScoringOptions(), beam)
+    }
+    assert expected[beam][0].score < expected[autoscore.ScoringOptions()][0].score
+
+    # beam results are cached apart from exact ones, as they may score lower
+    cache = PersistentCache(tmp_path / "results.sqlite")
+    for options in (beam, autoscore.ScoringOptions(), beam):
+        scored = score_subjects(sentences, sentence_ipas, subjects, "best-match", result_cache=cache, options=options)
+        assert scored == {"S1": expected[options]}
+
+    assert cache.stats() == {"hits": 1, "misses": 2, "size": 2}
+
+def test_segment_stats():
+    matrix = segment_score_matrix([[1, 1, 0, 1], [1, 0, 0, 1], [0, 1, 0]])
+    assert np.isnan(matrix[2, 3]) and matrix.shape == (3, 4)
+
+    # phonemes not scored for every subject are left out, as zip() did
+    assert segment_stats(matrix, ["mean", "std", "correct", "count"]) == {
+        "AVG": [0.67, 0.67, 0.0], "STD": [0.47, 0.47, 0.0], "CORRECT": [2, 2, 0], "N": [3, 3, 3]
+    }
+
+def test_segment_stats_rounding():
+    # 40 subjects, of whom k got phoneme k right: AVG is rounded as round(sum(l)/len(l), 2) always was
+    scores = [[int(subject < k) for k in range(41)] for subject in range(40)]
+    expected = [round(sum(col)/len(col), 2) for col in zip(*scores)]
+
+    assert segment_stats(segment_score_matrix(scores))["AVG"] == expected
+    assert (expected[1], expected[3]) == (0.03, 0.07)
+
+def test_write_per_segment(cmudict, tmp_path):
+    sentence_ipas = get_sentence_ipas(TARGETS)
+    scored = score_subjects(TARGETS, sentence_ipas, SUBJECTS, "best-match")
+    phoneme_scores = {
+        sentence: {subject: rows[i].score_by_phoneme for (subject, rows) in scored.items()}
+        for (i, sentence) in enumerate(TARGETS)
+    }
+
+    write_per_segment(tmp_path / "out.xlsx", phoneme_scores, dict(zip(TARGETS, sentence_ipas)), ["mean", "count"])
+    ws = load_workbook(tmp_path / "out.xlsx")["She sells sea shells"]
+    rows = [[cell.value for cell in row] for row in ws.iter_rows()]
+
+    scores = phoneme_scores["She sells sea shells"]
+    assert rows[1:4] == [[subject, *scores[subject]] for subject in SUBJECTS]
+    assert rows[4] == ["AVG", *(round(sum(n)/len(n), 2) for n in zip(*scores.values()))]
+    assert rows[5] == ["N", *[3]*len(scores["S1"])]
+
+def test_score_subjects_progress(cmudict, monkeypatch):
+    monkeypatch.setattr(autoscore, "PROGRESS_CHUNK_SIZE", 2)
+    sentence_ipas = get_sentence_ipas(TARGETS)
+
+    reported = []
+    scored = dict(autoscore.iter_score_subjects(
+        TARGETS, sentence_ipas, SUBJECTS, "best-match", progress=lambda *args: reported.append(args)
+    ))
+
+    assert scored == score_subjects(TARGETS, sentence_ipas, SUBJECTS, "best-match")
+    assert reported == [(0, 9), (2, 9), (4, 9), (6, 9), (8, 9), (9, 9)]
+
+def test_main_cancelled(cmudict, tmp_path, monkeypatch):
+    monkeypatch.setattr(autoscore, "PROGRESS_CHUNK_SIZE", 2)
+    df = pd.DataFrame({"Target": TARGETS, **SUBJECTS})
+
+    reported = []
+    with pytest.raises(autoscore.ScoringCancelled):
+        autoscore.main(
+            df.copy(), tmp_path, "out", result_cache=tmp_path / "cache.sqlite",
+            progress=lambda *args: reported.append(args), cancelled=lambda: len(reported) > 2
+        )
+
+    # nothing is written, but the rows scored before cancelling are cached
+    assert reported[-1] == (4, 9) and [*tmp_path.glob("*.xlsx")] == []
+    assert PersistentCache(tmp_path / "cache.sqlite").stats()["size"] == 4
+
+    assert autoscore.main(df.copy(), tmp_path, "out") == tmp_path / "out.xlsx"
+    assert (tmp_path / "out_PER_SEGMENT.xlsx").exists()
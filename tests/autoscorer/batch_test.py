@@ -0,0 +1,84 @@
+import sys
+import subprocess
+import pandas as pd
+import pytest
+from typing import get_args
+from openpyxl import load_workbook
+
+from spl_widgets.autoscorer import autoscorer_batch, autoscore, tokenize_to_ipa
+from autoscore_test import TARGETS, SUBJECTS
+
+@pytest.fixture
+def subject_files(tmp_path):
+    input_dir = tmp_path / "inputs"
+    input_dir.mkdir()
+
+    for (subject, transcriptions) in SUBJECTS.items():
+        # rows in a different order in each file, as they are sorted by target when read
+        rows = [*zip(TARGETS, transcriptions)][::(1 if subject == "S2" else -1)]
+        pd.DataFrame(rows, columns=["Target", subject]).to_excel(input_dir / f"{subject}.xlsx", index=False)
+
+    return input_dir
+
+def test_scoring_modes():
+    assert autoscorer_batch.SCORING_MODES == get_args(autoscore.ScoringMode)
+    assert autoscorer_batch.SCORING_METHODS == get_args(autoscore.ScoringMethod)
+
+def test_batch_combined(cmudict, subject_files, tmp_path):
+    autoscorer_batch.main([str(subject_files), "-o", str(tmp_path / "out"), "-n", "run"])
+
+    wb = load_workbook(tmp_path / "out" / "run.xlsx")
+    assert wb.sheetnames == [*SUBJECTS]
+    assert [row[0].value for row in wb["S1"].iter_rows(min_row=2, max_row=4)] == sorted(TARGETS)
+    assert wb["S1"]["F5"].value == "Total Score: 32/42"
+
+    assert load_workbook(tmp_path / "out" / "run_PER_SEGMENT.xlsx").sheetnames == sorted(TARGETS)
+
+def test_batch_preload(cmudict, subject_files, tmp_path):
+    try:
+        autoscorer_batch.main([str(subject_files), "-o", str(tmp_path / "out"), "-n", "run", "--preload"])
+        assert tokenize_to_ipa.cmudict_preloaded is not None
+    finally:
+        tokenize_to_ipa.unload_cmudict()
+
+    assert load_workbook(tmp_path / "out" / "run.xlsx")["S1"]["F5"].value == "Total Score: 32/42"
+
+def test_batch_scoring_options(cmudict, subject_files, tmp_path, monkeypatch, capsys):
+    passed = []
+    main = autoscore.main
+    monkeypatch.setattr(autoscore, "main", lambda *args, **kwargs: passed.append(kwargs["options"]) or main(*args, **kwargs))
+
+    autoscorer_batch.main([str(subject_files), "-o", str(tmp_path / "out"), "--scoring-method", "memo", "--max-states", "10"])
+    autoscorer_batch.main([str(subject_files), "-o", str(tmp_path / "beam"), "-m", "best-match", "--beam-width", "2"])
+    assert passed == [autoscore.ScoringOptions("memo", 10), autoscore.ScoringOptions(beam_width=2)]
+
+    # the scores are the same, however they are found
+    assert load_workbook(tmp_path / "out" / "autoscored.xlsx")["S1"]["F5"].value == "Total Score: 32/42"
+    assert "falling back to the score table" in capsys.readouterr().out
+
+    with pytest.raises(SystemExit):
+        autoscorer_batch.main([str(subject_files), "--beam-width", "0"])
+
+def test_batch_separate(cmudict, subject_files, tmp_path):
+    autoscorer_batch.main([str(subject_files), "--separate", "-o", str(tmp_path / "out"), "-j", "2"])
+
+    for subject in SUBJECTS:
+        assert load_workbook(tmp_path / "out" / f"{subject}_autoscored.xlsx").sheetnames == [subject]
+
+    assert load_workbook(tmp_path / "out" / "S1_autoscored.xlsx")["S1"]["F5"].value == "Total Score: 32/42"
+
+def test_batch_mismatched_targets(cmudict, subject_files, tmp_path, capsys):
+    pd.DataFrame([("The cat sat", "cat")], columns=["Target", "S4"]).to_excel(subject_files / "S4.xlsx", index=False)
+
+    with pytest.raises(SystemExit):
+        autoscorer_batch.main([str(subject_files), "-o", str(tmp_path / "out")])
+
+    assert "must have the same number of sentences" in capsys.readouterr().out
+    assert not (tmp_path / "out" / "autoscored.xlsx").exists()
+
+def test_batch_no_tkinter():
+    imported = subprocess.run(
+        [sys.executable, "-c", "import sys, spl_widgets.autoscorer.autoscorer_batch; print('tkinter' in sys.modules)"],
+        capture_output=True, text=True, check=True
+    )
+    assert imported.stdout.strip() == "False"
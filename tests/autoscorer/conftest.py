@@ -0,0 +1,52 @@
+import sqlite3
+import pytest
+
+from spl_widgets.autoscorer import tokenize_to_ipa
+from spl_widgets.util.sqlite_db import SQLiteDB
+
+# a small excerpt of data/cmudict.sqlite
+CMUDICT_ROWS = [
+    ('a', "[['AX'], ['EY']]"),
+    ('bass', "[['B', 'AE', 'S'], ['B', 'EY', 'S']]"),
+    ('birds', "[['B', 'ER', 'D', 'Z']]"),
+    ('book', "[['B', 'UH', 'K']]"),
+    ('boy', "[['B', 'OY']]"),
+    ('by', "[['B', 'AY']]"),
+    ('cat', "[['K', 'AE', 'T']]"),
+    ('dog', "[['D', 'AO', 'G']]"),
+    ('in', "[['IH', 'N'], ['IH', 'N']]"),
+    ('lead', "[['L', 'EH', 'D'], ['L', 'IY', 'D']]"),
+    ('live', "[['L', 'AY', 'V'], ['L', 'IH', 'V']]"),
+    ('mat', "[['M', 'AE', 'T']]"),
+    ('on', "[['AA', 'N'], ['AO', 'N']]"),
+    ('ran', "[['R', 'AE', 'N']]"),
+    ('read', "[['R', 'EH', 'D'], ['R', 'IY', 'D']]"),
+    ('red', "[['R', 'EH', 'D']]"),
+    ('sat', "[['S', 'AE', 'T']]"),
+    ('sea', "[['S', 'IY']]"),
+    ('sells', "[['S', 'EH', 'L', 'Z']]"),
+    ('she', "[['SH', 'IY']]"),
+    ('shells', "[['SH', 'EH', 'L', 'Z']]"),
+    ('shore', "[['SH', 'AO', 'R']]"),
+    ('sing', "[['S', 'IH', 'NG']]"),
+    ('store', "[['S', 'T', 'AO', 'R']]"),
+    ('tear', "[['T', 'EH', 'R'], ['T', 'IH', 'R']]"),
+    ('the', "[['DH', 'AX'], ['DH', 'AH'], ['DH', 'IY']]"),
+    ('to', "[['T', 'UW'], ['T', 'IH'], ['T', 'AX']]"),
+    ('trees', "[['T', 'R', 'IY', 'Z']]"),
+    ('wind', "[['W', 'AY', 'N', 'D'], ['W', 'IH', 'N', 'D']]"),
+]
+
+@pytest.fixture
+def cmudict(tmp_path, monkeypatch):
+    """Point tokenize_to_ipa at a small CMUdict database, with an empty lookup cache"""
+
+    db_fp = tmp_path / "cmudict.sqlite"
+    with sqlite3.connect(db_fp) as connection:
+        connection.execute("CREATE TABLE phones (word VARCHAR(33) PRIMARY KEY, transcriptions TEXT)")
+        connection.executemany("INSERT INTO phones VALUES (?, ?)", CMUDICT_ROWS)
+
+    monkeypatch.setattr(tokenize_to_ipa, "dba", SQLiteDB(str(db_fp), silent=True))
+    tokenize_to_ipa.clear_cache()
+    yield db_fp
+    tokenize_to_ipa.clear_cache()
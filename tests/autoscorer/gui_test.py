@@ -0,0 +1,33 @@
+import pandas as pd
+import pytest
+from queue import Queue
+from threading import Thread, Event
+from openpyxl import load_workbook
+
+from spl_widgets.autoscorer import autoscore, tokenize_to_ipa
+from autoscore_test import TARGETS, SUBJECTS
+
+pytest.importorskip("tkinterdnd2")
+from spl_widgets.autoscorer.autoscorer_gui import AutoscorerGUI
+
+def sheet_values(fp):
+    return [[[cell.value for cell in row] for row in ws.iter_rows()] for ws in load_workbook(fp)]
+
+def test_score_jobs_threads(cmudict, tmp_path):
+    df = pd.DataFrame({"Target": TARGETS, **SUBJECTS})
+    expected = sheet_values(autoscore.main(df.copy(), tmp_path, "expected"))
+
+    # each run scores on a new thread, which must look words up through its own CMUdict connection
+    for run in range(2):
+        tokenize_to_ipa.clear_cache()
+        scoring_queue = Queue()
+
+        thread = Thread(target=AutoscorerGUI.score_jobs, args=(
+            [(df.copy(), tmp_path, f"run{run}", ..., "preferred-transcription")], scoring_queue, Event()
+        ))
+        thread.start()
+        thread.join()
+
+        messages = [scoring_queue.get_nowait() for _ in range(scoring_queue.qsize())]
+        assert [kind for (kind, *_) in messages if kind != "progress"] == ["output", "done"]
+        assert sheet_values(tmp_path / f"run{run}.xlsx") == expected
@@ -0,0 +1,218 @@
+import random
+import pytest
+
+from spl_widgets.autoscorer.autoscore import score_transcription, output_scoring, get_results, AutoscorerTokens
+from spl_widgets.autoscorer.tokenize_to_ipa import str_to_ipa, to_arpabet_all, arpa_to_ipa
+from spl_widgets.util.color_util import to_rich_text, segments_to_rich_text
+
+# the recursive implementation score_transcription() replaced, kept as the reference for equivalence
+def score_transcription_reference(
+    sentence_ipa: list[str],
+    transcription_ipa: list[str],
+    _prev_scored: AutoscorerTokens = ...,
+    _prev_transcription_idx: int=0
+    ) -> tuple[int, AutoscorerTokens]:
+
+    def curr_score():
+        return sum((n[2] is True) for n in _prev_scored)
+
+    def last_token_idx():
+        return max((n[1] for n in _prev_scored), default=0)
+
+    if sentence_ipa == []:
+        lti = last_token_idx()
+        for i, token in enumerate(transcription_ipa, start=1):
+            _prev_scored.append((token,lti+i,False))
+
+        return (curr_score(), _prev_scored)
+
+    if _prev_transcription_idx==0:
+        _prev_scored = []
+
+    sentence_ipa_idx = 0
+    for i, token in enumerate(transcription_ipa):
+
+        absolute_idx = i+_prev_transcription_idx
+        if not token.isalpha():
+            continue
+
+        while not sentence_ipa[sentence_ipa_idx].isalpha():
+            sentence_ipa_idx += 1
+
+        if token == sentence_ipa[sentence_ipa_idx]:
+            return score_transcription_reference(
+                sentence_ipa[sentence_ipa_idx + 1:],
+                transcription_ipa[i+1:],
+                _prev_scored+[(token,absolute_idx,True)],
+                absolute_idx+1
+            )
+
+        elif token in sentence_ipa:
+            new_sentence_ipa_idx = sentence_ipa.index(token)
+            tokens_between = "".join(sentence_ipa[sentence_ipa_idx:new_sentence_ipa_idx])
+
+            omitted_idx = 0
+            if len(_prev_scored) > 0:
+                omitted_idx = max(n[1] for n in _prev_scored)+1
+            omitted_chars = [(tokens_between.strip(), omitted_idx, None)]
+
+            return max(
+                score_transcription_reference(
+                    sentence_ipa[new_sentence_ipa_idx+1:],
+                    transcription_ipa[i+1:],
+                    _prev_scored + omitted_chars + [(token,absolute_idx,True)],
+                    absolute_idx+1
+                ),
+                score_transcription_reference(
+                    sentence_ipa,
+                    transcription_ipa[i+1:],
+                    _prev_scored + [(token,absolute_idx,False)],
+                    absolute_idx+1
+                ),
+                key = lambda n: n[0]
+            )
+
+        else:
+            _prev_scored.append((token,absolute_idx,False))
+
+    _prev_scored.append(("".join(sentence_ipa), last_token_idx()+1, None))
+    return (curr_score(), _prev_scored)
+
+# the \R/\G/\Y/\C markup output_scoring() built for to_rich_text() before it returned segments
+def evaluation_markup_reference(transcription_ipa: list[str], prev_scored: AutoscorerTokens) -> str:
+    transcription_chars = [*transcription_ipa]
+
+    for (token, idx, is_valid) in prev_scored:
+        if is_valid is not None:
+            transcription_chars[idx] = ("\\G" if is_valid else "\\Y") + token + "\\C"
+
+    incr = 0
+    for (token, idx, _) in filter(lambda n: n[2] is None, prev_scored):
+        transcription_chars.insert(idx+incr, f"(\\R{token}\\C)")
+        incr += 1
+
+    return "".join(transcription_chars)
+
+# the color of each character of rich text
+def char_colors(rich_text) -> list[tuple[str|None, str]]:
+    return [
+        (None if isinstance(block, str) else block.font.color.rgb, char)
+        for block in rich_text for char in str(block)
+    ]
+
+SENTENCE_PAIRS = [
+    ("The cat sat on the mat", "The cat sat on the mat"),
+    ("The cat sat on the mat", "A cat sat on a mat"),
+    ("The cat sat on the mat", "The bat sat"),
+    ("The cat sat on the mat", "mat the on sat cat the"),
+    ("She sells sea shells by the sea shore", "She sells shells by the shore"),
+    ("She sells sea shells by the sea shore", "Sea shells she sells, by the shore"),
+    ("The boy ran to the red book", "The dog ran to the birds"),
+    ("The boy ran to the red book", "boy boy boy read lead"),
+    ("Live in the sea", "Lead the cat in"),
+    ("A dog", "xyzzy"),
+    ("A dog", ""),
+    ("The mat", "The mat, the cat, the dog and the boy"),
+]
+
+@pytest.mark.parametrize("sentence,transcription", SENTENCE_PAIRS)
+def test_score_transcription_sentences(cmudict, sentence, transcription):
+    sentence_ipa, transcription_ipa = str_to_ipa(sentence), str_to_ipa(transcription, True)
+    results = score_transcription(sentence_ipa, transcription_ipa)
+
+    assert results == score_transcription_reference(sentence_ipa, transcription_ipa)
+    assert results == score_transcription(sentence_ipa, transcription_ipa, "memo")
+    assert output_scoring(sentence_ipa, transcription_ipa, results)[0] == results[0]
+
+@pytest.mark.parametrize("sentence,transcription", SENTENCE_PAIRS)
+def test_output_scoring_segments(cmudict, sentence, transcription):
+    sentence_ipa = str_to_ipa(sentence)
+
+    for scoring_mode in ["preferred-transcription", "best-match"]:
+        transcription_ipa, results = get_results(sentence_ipa, transcription, scoring_mode)
+        evaluation = output_scoring(sentence_ipa, transcription_ipa, results)[2]
+
+        # the same colored text as the markup, with adjacent runs of a color merged
+        assert char_colors(segments_to_rich_text(evaluation)) == char_colors(
+            to_rich_text(evaluation_markup_reference(transcription_ipa, results[1]))
+        )
+        assert all(color != next_color for ((color, _), (next_color, _)) in zip(evaluation, evaluation[1:]))
+
+def test_score_transcription_random():
+    rng = random.Random(0)
+    tokens = ["a", "b", "c", "d", "e", "ɑi", " ", " ", "*x"]
+
+    compared = 0
+    for _ in range(2000):
+        sentence_ipa = rng.choices(tokens[:-1], k=rng.randint(1, 12))
+        transcription_ipa = rng.choices(tokens, k=rng.randint(0, 12))
+
+        try:
+            expected = score_transcription_reference(sentence_ipa, transcription_ipa)
+        except IndexError:      # the reference fails once no IPA is left in the sentence
+            continue
+
+        assert score_transcription(sentence_ipa, transcription_ipa) == expected
+        assert score_transcription(sentence_ipa, transcription_ipa, "memo") == expected
+        compared += 1
+
+    assert compared > 1000
+
+def test_score_transcription_long():
+    sentence_ipa = [*"abcde fghij "]*40
+    transcription_ipa = [*"edcba jihgf "]*40      # exponential for the recursive version
+
+    score, scored = score_transcription(sentence_ipa, transcription_ipa)
+    assert score == sum(valid is True for (_, _, valid) in scored) and score >= 40 * 2
+
+    # no IPA left in the sentence: remaining transcription IPA is extraneous
+    assert score_transcription(["a", " ", "*x"], ["a", "b", "a"]) == (
+        1, [("a", 0, True), ("b", 1, False), ("a", 2, False), (" *x", 3, None)]
+    )
+
+def test_score_transcription_memo_fallback(capsys):
+    sentence_ipa = [*"abcde fghij "]*40
+    transcription_ipa = [*"edcba jihgf "]*40
+
+    expected = score_transcription(sentence_ipa, transcription_ipa)
+    assert capsys.readouterr().out == ""
+
+    assert score_transcription(sentence_ipa, transcription_ipa, "memo", max_states=200_000) == expected
+    assert capsys.readouterr().out == ""
+
+    assert score_transcription(sentence_ipa, transcription_ipa, "memo", max_states=100) == expected
+    assert capsys.readouterr().out.startswith("[WARN]: Memoized scoring needed over 100 states")
+
+# the exhaustive best-match scoring best_match_ipa() replaced, kept as the reference for equivalence
+def best_match_reference(sentence_ipa, transcription):
+    poss_results = []
+    for ipa in map(arpa_to_ipa, to_arpabet_all(transcription)):
+        poss_results.append( (ipa, score_transcription(sentence_ipa, ipa)) )
+
+    return max(poss_results, key = lambda n: n[1][0])
+
+BEST_MATCH_PAIRS = [
+    *SENTENCE_PAIRS,
+    ("The wind will tear the trees", "The wind will tear the trees"),
+    ("I read the book to the boy", "I read a book to a boy"),
+    ("Live in the sea by the shore", "live on the sea, live in the wind"),
+    ("The bass sat in the lead", "a bass and a lead, the bass in the lead"),
+    ("She will sing to the trees", "the the the to to to a a"),
+]
+
+@pytest.mark.parametrize("sentence,transcription", BEST_MATCH_PAIRS)
+def test_best_match(cmudict, sentence, transcription):
+    sentence_ipa = str_to_ipa(sentence)
+    expected = best_match_reference(sentence_ipa, transcription)
+
+    assert get_results(sentence_ipa, transcription, "best-match") == expected
+    assert get_results(sentence_ipa, transcription, "best-match", "memo") == expected
+    assert get_results(sentence_ipa, transcription, "best-match", best_match_search="exhaustive") == expected
+
+def test_best_match_beam(cmudict):
+    sentence_ipa = str_to_ipa("the wind will tear the trees to the shore " * 4)
+    transcription = "the wind to tear a lead to the read live bass " * 4      # 2**30 * 3**12 pronunciations
+
+    (score, _) = get_results(sentence_ipa, transcription, "best-match")[1]
+    (beam_score, _) = get_results(sentence_ipa, transcription, "best-match", beam_width=2)[1]
+    assert 0 < beam_score <= score
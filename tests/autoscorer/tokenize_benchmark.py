@@ -0,0 +1,47 @@
+# microbenchmark of tokenize_ipa(): per-call cost of the module-level compiled regex against
+# rebuilding the regex on every call (as it was), over a synthetic corpus of sentence IPA
+#
+#   python tests/autoscorer/tokenize_benchmark.py [n_sentences]
+
+import random
+import re
+import sys
+from timeit import timeit
+
+from spl_widgets.autoscorer.tokenize_to_ipa import phonemes, tokenize_ipa, tokenize_many, _replace_ligatures
+
+def tokenize_ipa_uncompiled(ipa_str: str) -> list[str]:
+    ipa_str = _replace_ligatures(ipa_str)
+    tokens = sorted(phonemes.values(), key=len, reverse=True)
+    token_re = rf"({'|'.join(tokens)}|\s|\*[\w\']*)"
+
+    return re.findall(token_re, ipa_str)
+
+# sentences of 4-12 words of 1-8 phonemes, with the odd ligature and unrecognized (flagged) word
+def make_corpus(n_sentences: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    symbols = [*phonemes.values(), "ʧ", "ʤ"]
+
+    def word():
+        if rng.random() < 0.05:
+            return "*" + "".join(rng.choices("abcdefghijklmnopqrstuvwxyz", k=rng.randint(3, 8)))
+        return "".join(rng.choices(symbols, k=rng.randint(1, 8)))
+
+    return [" ".join(word() for _ in range(rng.randint(4, 12))) for _ in range(n_sentences)]
+
+def main(n_sentences: int = 2000):
+    corpus = make_corpus(n_sentences)
+    assert [*map(tokenize_ipa_uncompiled, corpus)] == [*map(tokenize_ipa, corpus)] == tokenize_many(corpus)
+
+    timings = {
+        "uncompiled (per call)": timeit(lambda: [*map(tokenize_ipa_uncompiled, corpus)], number=5),
+        "tokenize_ipa": timeit(lambda: [*map(tokenize_ipa, corpus)], number=5),
+        "tokenize_many": timeit(lambda: tokenize_many(corpus), number=5),
+    }
+
+    print(f"{n_sentences} sentences, mean {sum(map(len, corpus))/n_sentences:.0f} characters")
+    for (name, seconds) in timings.items():
+        print(f"{name:>22}: {seconds/(5*n_sentences)*1e6:6.2f} us/sentence")
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,56 @@
+# startup benchmark of the console scripts: wall time of importing each entry point's module and of
+# running it with --help, each in a fresh interpreter, alongside which heavy modules were loaded
+#
+#   python tests/import_benchmark.py [repeats]
+
+import subprocess
+import sys
+from statistics import median
+from time import perf_counter
+
+HEAVY_MODULES = ["pandas", "numpy", "tkinter", "openpyxl"]
+
+# the module of each console script (see setup.py), and whether it takes --help
+ENTRY_POINTS = {
+    "open_overrides": ("spl_widgets.overrides.open_overrides", False),
+    "gorilla_clean": ("spl_widgets.gorilla_clean", True),
+    "tuner": ("spl_widgets.tuner", False),
+    "stk_swx": ("spl_widgets.stk_swx", True),
+    "batch_tune": ("spl_widgets.batch_tune", True),
+    "jukemake": ("spl_widgets.jukemake", True),
+    "autoscorer": ("spl_widgets.autoscorer.autoscorer_gui", False),
+    "autoscorer_batch": ("spl_widgets.autoscorer.autoscorer_batch", True),
+}
+
+def time_code(code: str, repeats: int) -> tuple[float, list[str]]:
+    check = f"{code}\nimport sys; print(*(m for m in {HEAVY_MODULES!r} if m in sys.modules), file=sys.stderr)"
+
+    times = []
+    for _ in range(repeats):
+        start = perf_counter()
+        result = subprocess.run([sys.executable, "-c", check], capture_output=True, text=True)
+        times.append(perf_counter() - start)
+
+    if result.returncode != 0:
+        return (float("nan"), ["(failed: " + result.stderr.strip().splitlines()[-1] + ")"])
+
+    return (median(times), result.stderr.split())
+
+def main(repeats: int = 5):
+    (baseline, _) = time_code("pass", repeats)
+    print(f"interpreter startup: {baseline*1e3:.0f} ms (subtracted below)\n")
+    print(f"{'entry point':>17} {'import':>8} {'--help':>8}  heavy modules loaded on import")
+
+    for (name, (module, has_help)) in ENTRY_POINTS.items():
+        (import_time, loaded) = time_code(f"import {module}", repeats)
+
+        help_str = "-"
+        if has_help:
+            help_code = f"import sys; sys.argv = ['{name}', '--help']\ntry:\n    import {module}; {module}.main()\nexcept SystemExit: pass"
+            (help_time, _) = time_code(help_code, repeats)
+            help_str = f"{(help_time-baseline)*1e3:.0f} ms"
+
+        print(f"{name:>17} {(import_time-baseline)*1e3:5.0f} ms {help_str:>8}  {', '.join(loaded) or '-'}")
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
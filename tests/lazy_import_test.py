@@ -0,0 +1,46 @@
+import sys
+import subprocess
+import pytest
+
+HEAVY_MODULES = ["pandas", "numpy", "tkinter", "openpyxl"]
+
+# the console script modules that must not load heavy modules until they are needed (e.g. not for --help)
+LIGHT_MODULES = [
+    "spl_widgets.batch_tune",
+    "spl_widgets.stk_swx",
+    "spl_widgets.gorilla_clean",
+    "spl_widgets.jukemake",
+    "spl_widgets.overrides.open_overrides",
+    "spl_widgets.autoscorer.autoscorer_batch",
+    "spl_widgets.misc_util",
+    "spl_widgets.tune_freq",
+]
+
+def imported_modules(code: str) -> set[str]:
+    check = f"import sys; {code}; print(*(m for m in {HEAVY_MODULES!r} if m in sys.modules), file=sys.stderr)"
+    result = subprocess.run([sys.executable, "-c", check], capture_output=True, text=True, check=True)
+    return set(result.stderr.split())
+
+@pytest.mark.parametrize("module", LIGHT_MODULES)
+def test_no_heavy_imports(module):
+    assert imported_modules(f"import {module}") == set()
+
+@pytest.mark.parametrize("module", [m for m in LIGHT_MODULES if not m.endswith(("open_overrides", "_util", "tune_freq"))])
+def test_help_no_heavy_imports(module):
+    code = f"sys.argv = ['prog', '--help']\ntry:\n    import {module}; {module}.main()\nexcept SystemExit: pass"
+    assert imported_modules(f"exec({code!r})") == set()
+
+def test_tokenize_to_ipa_connects_on_first_lookup():
+    # importing the tokenizer (or the autoscorer) leaves the CMUdict database unopened
+    code = "from spl_widgets.autoscorer import autoscore, tokenize_to_ipa as t; print(t.dba is None)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "True"
+
+def test_key_validation_no_heavy_imports():
+    code = "from spl_widgets.misc_util import get_tuning_info; get_tuning_info('110-AB5-7')"
+    assert imported_modules(code) == set()
+
+def test_lazy_module():
+    code = "from spl_widgets.util.import_util import lazy_import; np = lazy_import('numpy')"
+    assert imported_modules(code) == set()
+    assert imported_modules(f"{code}; np.zeros(1)") == {"numpy"}
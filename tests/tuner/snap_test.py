@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from spl_widgets import tune_freq
+from spl_widgets.misc_util import (
+    construct_default_scale, construct_note_freqs, default_scales,
+    get_closest, get_note_table, snap_to_scale
+)
+from spl_widgets.overrides.tuner_overrides import _get_second_closest
+
+@pytest.mark.parametrize("scale_type", default_scales.keys())
+@pytest.mark.parametrize("note", range(1, 13))
+def test_snap_matches_get_closest(scale_type, note):
+    scale = construct_default_scale(note, scale_type)
+    pool = construct_note_freqs(scale)
+
+    freqs = np.random.default_rng(note).uniform(10, 5000, 500)
+    expected = [get_closest(pool, f) for f in freqs]
+
+    assert np.array_equal(snap_to_scale(freqs, get_note_table(scale)), expected)
+
+def test_note_table_cached_by_scale():
+    table = get_note_table([4, 6, 8])
+    assert get_note_table([8, 4, 6, 4]) is table
+    assert np.all(np.diff(table) > 0)
+    assert not table.flags.writeable
+
+def test_snap_single_note_and_empty_table():
+    assert np.array_equal(snap_to_scale([1.0, 500.0], np.array([440.0])), [440.0, 440.0])
+    with pytest.raises(ValueError):
+        snap_to_scale([440.0], np.array([]))
+
+def test_get_closest_override_honoured(monkeypatch):
+    assert tune_freq.get_snap_strategy() is snap_to_scale
+
+    monkeypatch.setattr(tune_freq, "get_closest", _get_second_closest)
+    snap = tune_freq.get_snap_strategy()
+
+    note_table = get_note_table([1])
+    assert np.array_equal(snap(np.array([440.0]), note_table), [220.0])
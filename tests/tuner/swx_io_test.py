@@ -0,0 +1,62 @@
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pytest
+
+from spl_widgets.misc_util import read_df, read_swx, df_to_tsv, write_swx, MalformedFileError
+
+BARK_FP = Path(__file__).parent / "tune_freq" / "bark.swx"
+
+def test_read_swx_matches_read_df():
+    swx = read_swx(str(BARK_FP))
+    df = read_df(str(BARK_FP))
+
+    assert swx.formants == len(df.columns)//2
+    assert np.array_equal(swx.data, df.to_numpy(dtype=float))
+    assert np.array_equal(swx.freq_col(2), df[3]) and np.array_equal(swx.amp_col(2), df[4])
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+def test_read_swx_line_endings(tmp_path, newline):
+    fp = tmp_path / "endings.swx"
+    fp.write_bytes(BARK_FP.read_bytes().replace(b"\r", newline.encode()))
+
+    assert np.array_equal(read_swx(str(fp)).data, read_swx(str(BARK_FP)).data)
+
+def test_read_swx_trailing_columns_and_dtype(tmp_path):
+    fp = tmp_path / "trailing.swx"
+    fp.write_text("1\t\t\t\r0\t100\t0.5\t\r10\t200.5\t0\t")
+
+    swx = read_swx(str(fp), dtype=np.float32)
+    assert swx.formants == 1 and swx.data.dtype == np.float32
+    assert np.array_equal(swx.data, [[0, 100, 0.5], [10, 200.5, 0]])
+
+@pytest.mark.parametrize("content", ["", "2\t\t\t\t", "x\t\t\r0\t1\t2", "1\t\t\r0\t1\r10\t2"])
+def test_read_swx_malformed(tmp_path, content):
+    fp = tmp_path / "bad.swx"
+    fp.write_text(content)
+
+    with pytest.raises(MalformedFileError):
+        read_swx(str(fp))
+
+def test_write_swx_matches_df_to_tsv(tmp_path):
+    rng = np.random.default_rng(0)
+    data = np.concatenate([
+        read_swx(str(BARK_FP)).data,
+        rng.uniform(0, 5000, (50, 11)).round(rng.integers(0, 12)),
+        rng.choice([0.0, 1e-7, 2.5e16, 123456789.125], (20, 11))
+    ])
+
+    df = pd.DataFrame(data)
+    df.columns = [5]+['']*10
+
+    fp = tmp_path / "out.swx"
+    write_swx(str(fp), data, block_rows=7)
+    assert fp.read_text() == df_to_tsv(df)
+
+def test_write_swx_precision_roundtrip(tmp_path):
+    swx = read_swx(str(BARK_FP))
+    fp = tmp_path / "out.swx"
+    with open(fp, "w") as writer:
+        write_swx(writer, swx.data, swx.formants, precision=6)
+
+    assert np.allclose(read_swx(str(fp)).data, swx.data, rtol=1e-5)
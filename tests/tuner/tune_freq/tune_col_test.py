@@ -0,0 +1,70 @@
+from pathlib import Path
+import numpy as np
+import pytest
+
+from spl_widgets.misc_util import read_df, construct_note_freqs, construct_default_scale, get_closest
+from spl_widgets.tune_freq import tune_col
+
+BARK_FP = str(Path(__file__).parent / "bark.swx")
+
+# the per-slice implementation tune_col() replaced, kept as the reference for equivalence
+def tune_col_reference(freq_col, amp_col, interval, tune_freqs, scale_notes):
+
+    freq_col = np.where(amp_col>0, freq_col, 0)
+    new_col =[]
+
+    for slice_start in range(0, len(freq_col), interval):
+
+        slice_end = slice_start + interval
+        freq_slice = freq_col[slice_start:slice_end]
+
+        nz_amps = np.count_nonzero(amp_col[slice_start:slice_end])
+        if nz_amps == 0:
+            new_col.extend(freq_slice)
+            continue
+
+        range_freq = sum(freq_slice) / nz_amps
+
+        if tune_freqs is True and range_freq != 0:
+            range_freq = get_closest(scale_notes, range_freq)
+
+        new_col+=[range_freq]*len(freq_slice)
+
+    for i, cell in enumerate(new_col):
+        if cell == 0:
+            if max(amp_col[max(0,i-1):i+2]) == 0:
+                continue
+
+            new_col[i] = max(new_col[max(0,i-1):i+2])
+
+    return new_col
+
+SCALE_NOTES = construct_note_freqs(construct_default_scale(4, "Major Scale"))
+
+def assert_equivalent(freq_col, amp_col, interval, tune_freqs):
+    expected = np.asarray(tune_col_reference(freq_col, amp_col, interval, tune_freqs, SCALE_NOTES), dtype=float)
+    actual = tune_col(freq_col, amp_col, interval, tune_freqs, SCALE_NOTES)
+    assert np.array_equal(expected, actual)
+
+@pytest.mark.parametrize("interval", [1, 2, 3, 7, 10, 25, 99])
+@pytest.mark.parametrize("tune_freqs", [True, False])
+def test_bark_equivalence(interval, tune_freqs):
+    df = read_df(BARK_FP)
+    for fmt in range(1, len(df.columns)//2 + 1):
+        assert_equivalent(df.iloc[:,2*fmt-1], df.iloc[:,2*fmt], interval, tune_freqs)
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("interval", [1, 4, 9])
+def test_random_equivalence(seed, interval):
+    rng = np.random.default_rng(seed)
+    size = rng.integers(1, 300)
+
+    freq_col = rng.uniform(100, 4000, size).round(rng.integers(0, 4))
+    amp_col = rng.uniform(0, 1, size) * (rng.random(size) > 0.3)
+
+    # zero-frequency runs under nonzero amplitudes exercise the cascading gap-fill
+    freq_col[rng.random(size) < 0.3] = 0
+    for start in rng.integers(0, size, 3):
+        freq_col[start:start+rng.integers(1, 15)] = 0
+
+    assert_equivalent(freq_col, amp_col, interval, seed % 2 == 0)
@@ -0,0 +1,54 @@
+from pathlib import Path
+import shutil
+
+from spl_widgets.tune_freq import tune_cols, tune_cols_many, tune_files, TuningParams
+
+BARK_FP = Path(__file__).parent / "bark.swx"
+
+TUNINGS = [
+    TuningParams(10, [4, 6, 8, 9, 11, 1, 3], True, None),
+    TuningParams(10, [1, 5], True, [2, 3]),         # same interval, different scale: shares averages
+    TuningParams(10, [1, 5], True, [2]),            # shares tuned columns with the above
+    TuningParams(3, [], False, None),
+    TuningParams(3, [2], False, [1]),
+]
+
+def read_outputs(out_dir: str) -> tuple[str, str]:
+    return (
+        Path(out_dir, "bark_tuned.swx").read_text(),
+        Path(out_dir, "params.txt").read_text()
+    )
+
+def test_tune_cols_many_matches_tune_cols(tmp_path):
+    fp = str(shutil.copy(BARK_FP, tmp_path))
+
+    out_dirs = tune_cols_many(fp, TUNINGS)
+    assert len(set(out_dirs)) == len(TUNINGS)
+
+    for params, out_dir in zip(TUNINGS, out_dirs):
+        assert read_outputs(out_dir) == read_outputs(tune_cols(fp, *params))
+
+def test_tune_files_parallel_matches_sequential(tmp_path):
+    for name in ["a", "b"]:
+        shutil.copy(BARK_FP, tmp_path / f"{name}.swx")
+    (tmp_path / "broken.swx").write_text("not a swx file")
+
+    fps = sorted(map(str, tmp_path.glob("*.swx")))
+    progress = []
+
+    out_dirs, errors = tune_files(fps, TUNINGS, jobs=2, on_progress=lambda *args: progress.append(args[:2]))
+    seq_out_dirs, seq_errors = tune_files(fps, TUNINGS, jobs=1, on_progress=lambda *args: None)
+
+    total = len(fps) * len(TUNINGS)
+    assert progress == [(i, total) for i in range(1, total+1)]
+
+    assert len(out_dirs) == len(seq_out_dirs) == 2 * len(TUNINGS)
+    assert {fp for (fp, _, _) in errors} == {fp for (fp, _, _) in seq_errors} == {str(tmp_path / "broken.swx")}
+
+    # output folders are named by run, file and key, so both runs produce the same set of outputs
+    strip_stamp = lambda out_dir: Path(out_dir).name.split("_", 4)[-1]
+    assert [*map(strip_stamp, out_dirs)] == [*map(strip_stamp, seq_out_dirs)]
+
+    for out_dir, seq_out_dir in zip(out_dirs, seq_out_dirs):
+        swx_fn = next(Path(out_dir).glob("*.swx")).name
+        assert Path(out_dir, swx_fn).read_text() == Path(seq_out_dir, swx_fn).read_text()
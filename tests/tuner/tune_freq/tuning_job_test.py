@@ -0,0 +1,50 @@
+from pathlib import Path
+from queue import Queue
+from threading import Event
+import shutil
+
+from spl_widgets.tune_freq import TuningParams
+from spl_widgets import tuner
+from spl_widgets.tuner import TuningJob, run_tuning_job
+
+BARK_FP = Path(__file__).parent / "bark.swx"
+PARAMS = TuningParams(10, [4, 6, 8, 9, 11, 1, 3], True, None)
+
+def get_messages(messages: Queue) -> list[tuple]:
+    return [messages.get_nowait() for _ in range(messages.qsize())]
+
+def make_job(tmp_path, jobs: int) -> TuningJob:
+    for name in ["a", "b", "c"]:
+        shutil.copy(BARK_FP, tmp_path / f"{name}.swx")
+
+    return TuningJob(tmp_path.name, sorted(map(str, tmp_path.glob("*.swx"))), PARAMS, jobs, str(tmp_path))
+
+def test_run_tuning_job(tmp_path):
+    job = make_job(tmp_path, 2)
+    messages = Queue()
+    run_tuning_job(job, messages, Event())
+
+    (*progress, end) = get_messages(messages)
+    assert [msg[:3] for msg in progress] == [("progress", i, 3) for i in range(1, 4)]
+    assert end[0] == "done" and sorted(end[1]) == sorted(msg[4] for msg in progress)
+
+def test_run_tuning_job_cancelled(tmp_path):
+    job = make_job(tmp_path, 1)
+    (messages, cancel_event) = (Queue(), Event())
+    cancel_event.set()
+
+    # the file being tuned when cancelled is finished, but no more are started
+    run_tuning_job(job, messages, cancel_event)
+    assert [msg[0] for msg in get_messages(messages)] == ["progress", "cancelled"]
+    assert len([*tmp_path.glob("*/*.swx")]) == 1
+
+def test_run_tuning_job_error(tmp_path, monkeypatch):
+    def iter_tune_files(*args):
+        raise PermissionError("can't create the output folder")
+
+    # errors outside the tuning of each file still end the job, so the next one can start
+    monkeypatch.setattr(tuner, "iter_tune_files", iter_tune_files)
+    messages = Queue()
+    run_tuning_job(make_job(tmp_path, 1), messages, Event())
+
+    assert get_messages(messages) == [("error", repr(PermissionError("can't create the output folder")))]